@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='apikey',
+            name='hashed_key',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+    ]
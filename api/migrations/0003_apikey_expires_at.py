@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_apikey_hashed_key_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apikey',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_apikey_expires_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apikey',
+            index=models.Index(fields=['owner', 'is_active'], name='apikey_owner_active_idx'),
+        ),
+    ]
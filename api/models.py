@@ -7,20 +7,55 @@ rate limiting, and tracking usage statistics.
 """
 
 from django.db import models
+from django.db.models import F, Q
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 import secrets
 import hashlib
 
+from .usage import record_use, usage_is_buffered
+
+
+CHECK_KEY_CACHE_KEY = 'apikey:{}'
+CHECK_KEY_CACHE_TIMEOUT = 60  # seconds
+CHECK_KEY_FIELDS = ('id', 'hashed_key', 'owner_id', 'is_active', 'rate_limit',
+                    'expires_at')
+
 # Create your models here.
 
 
+class ApiKeyQuerySet(models.QuerySet):
+    """
+    QuerySet for API keys that keeps `ApiKey.check_key`'s cache current.
+    """
+
+    def update(self, **kwargs):
+        """
+        Update the matching keys, dropping their cached lookups when a
+        cached field changes, e.g. `update(is_active=False)`.
+
+        update() sends no post_save, so the hashes of the affected keys
+        are read first. Updates of other fields, such as the usage
+        counters, cost nothing extra.
+        """
+        attnames = {self.model._meta.get_field(name).attname for name in kwargs}
+        if attnames.isdisjoint(CHECK_KEY_FIELDS):
+            return super().update(**kwargs)
+        hashes = list(self.values_list('hashed_key', flat=True))
+        rows = super().update(**kwargs)
+        cache.delete_many([CHECK_KEY_CACHE_KEY.format(hashed) for hashed in hashes])
+        return rows
+
+    update.alters_data = True
+
+
 class ApiKey(models.Model):
     """
     Model representing an API key.
     """
     key = models.CharField(max_length=50, unique=True, editable=False)
-    hashed_key = models.CharField(max_length=64)
+    hashed_key = models.CharField(max_length=64, db_index=True)
     app_id = models.CharField(max_length=40, unique=True)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL,
                               on_delete=models.CASCADE)
@@ -29,6 +64,15 @@ class ApiKey(models.Model):
     rate_limit = models.IntegerField(default=100)  # requests per hour
     last_used = models.DateTimeField(null=True, blank=True)
     usage_count = models.IntegerField(default=0)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = ApiKeyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'is_active'],
+                         name='apikey_owner_active_idx'),
+        ]  # Owner-scoped listings of active keys
 
     def save(self, *args, **kwargs):
         """
@@ -51,7 +95,14 @@ class ApiKey(models.Model):
 
     @property
     def is_expired(self):
+        """
+        Whether the API key has passed its expiry time.
+
+        Keys without an expiry time never expire.
 
+        Returns:
+            bool: True if the key has expired, False otherwise.
+        """
         if self.expires_at is None:
             return False
         return timezone.now() > self.expires_at
@@ -63,10 +114,18 @@ class ApiKey(models.Model):
 
         This method should be called each time the API key is used to
         keep track of its usage and enforce rate limits.
+
+        When a shared cache is configured, the use is buffered in it and
+        written to the database in bulk by the `flush_apikey_usage` task,
+        so the hot path does not issue a write. The stored `usage_count`
+        and `last_used` values then lag behind by at most one flush
+        interval. Without one, the counter is incremented in the database.
         """
-        self.usage_count += 1
-        self.last_used = timezone.now()
-        self.save()
+        if usage_is_buffered():
+            record_use(self.pk)
+            return
+        ApiKey.objects.filter(pk=self.pk).update(
+            usage_count=F('usage_count') + 1, last_used=timezone.now())
 
     @staticmethod
     def generate_key():
@@ -99,11 +158,43 @@ class ApiKey(models.Model):
         Args:
             key (str): The API key to check.
 
+        Only active keys that have not expired are matched. On a cache
+        miss the owner is fetched in the same query.
+
+        Matches are cached for a short time by their hash, and dropped
+        when the key is saved, deleted or updated through its queryset.
+        Only the columns in `CHECK_KEY_FIELDS` are cached, and a cache hit
+        returns an instance rebuilt from them, so reading any other field,
+        or the owner beyond `owner_id`, on a cached instance loads it from
+        the database.
+
         Returns:
             ApiKey: The matching ApiKey instance, or None if not found.
         """
         hashed = cls.hash_key(key)
-        return cls.objects.filter(hashed_key=hashed).first()
+        cache_key = CHECK_KEY_CACHE_KEY.format(hashed)
+        field_names = [f.attname for f in cls._meta.concrete_fields
+                       if f.attname in CHECK_KEY_FIELDS]
+
+        values = cache.get(cache_key)
+        if values is not None:
+            api_key = cls.from_db(None, field_names, values)
+            # The key may have expired since it was cached
+            return None if api_key.is_expired else api_key
+
+        try:
+            api_key = cls.objects.select_related('owner').only(
+                'id', 'hashed_key', 'is_active', 'rate_limit', 'expires_at',
+                'owner__id', 'owner__username'
+            ).get(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()),
+                  hashed_key=hashed, is_active=True)
+        except cls.DoesNotExist:
+            return None
+
+        cache.set(cache_key,
+                  tuple(getattr(api_key, name) for name in field_names),
+                  CHECK_KEY_CACHE_TIMEOUT)
+        return api_key
 
     def regenerate_key(self):
         """
@@ -116,11 +207,11 @@ class ApiKey(models.Model):
             str: The newly generated API key.
         """
         self.is_active = False
-        self.save()
+        self.save(update_fields=['is_active'])
 
         # Create a new key instance
         new_key = ApiKey.objects.create(
-            owner=self.owner,
+            owner_id=self.owner_id,
             app_id=self.app_id,  # Use the same app_id
             rate_limit=self.rate_limit,  # Same rate limit as before
         )
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from rest_framework import serializers
 from user_management.models import User, Role, Profile, Permission, UserRole, RolePermission
 from product_management_service.models import Product, Category, Inventory
@@ -66,19 +67,19 @@ class UserSerializer(serializers.ModelSerializer):
 class RoleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Role
-        fields = '__all__'
+        fields = ['id', 'name', 'description']
 
 
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
-        fields = '__all__'
+        fields = ['id', 'user', 'bio', 'avatar']
 
 
 class PermissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Permission
-        fields = '__all__'
+        fields = ['id', 'name', 'description']
 
 
 
@@ -89,7 +90,8 @@ class ProductSerializer(serializers.ModelSerializer):
     Serializer for the Product model.
 
     This serializer handles the serialization and deserialization of
-    Product instances, including validation for price and stock quantity.
+    Product instances. Price and stock quantity are validated as
+    non-negative by their field validators.
 
     Attributes:
         Meta (class): Contains metadata about the serializer, including
@@ -99,43 +101,66 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = '__all__'
+        fields = ['id', 'sku', 'name', 'description', 'price', 'price_cents',
+                  'stock_quantity', 'category', 'barcode',
+                  'min_stock_threshold', 'max_stock_threshold',
+                  'current_stock', 'created_at', 'updated_at']
+        read_only_fields = ['price_cents', 'current_stock', 'created_at', 'updated_at']
+        # Declared on the fields so they run in DRF's validator chain
+        extra_kwargs = {
+            # Blank SKUs are only for imports; the API generates or requires one
+            'sku': {'allow_blank': False},
+            'price': {
+                'min_value': Decimal('0'),
+                'error_messages': {'min_value': "Price must be a positive number."}
+            },
+            'stock_quantity': {
+                'min_value': 0,
+                'error_messages': {'min_value': "Stock quantity cannot be negative."}
+            }
+        }
 
-    def validate_price(self, value):
+    @classmethod
+    def optimized_queryset(cls):
         """
-        Validate the price field.
-
-        Args:
-            value (Decimal): The value of the price to validate.
+        Return the base queryset views should serialize products from.
 
-        Raises:
-            ValidationError: If the price is negative.
+        Only the serialized columns are loaded. The category is rendered
+        as its primary key, which is read from category_id, so it is not
+        joined. Inventory rows are not prefetched since current stock is
+        read from the product itself.
 
         Returns:
-            Decimal: The validated price value.
+            QuerySet: Products limited to the serialized columns.
         """
-        if value < 0:
-            raise serializers.ValidationError("Price must be a positive\
-                                              number.")
-        return value
+        return Product.objects.only(*cls.Meta.fields)
 
-    def validate_stock_quantity(self, value):
+    @classmethod
+    def serialize_rows(cls, rows):
         """
-        Validate the stock_quantity field.
+        Serialize product rows fetched with `values(*Meta.fields)`.
 
-        Args:
-            value (int): The value of the stock quantity to validate.
+        Each value goes through its field's `to_representation`, so the
+        output matches serializing Product instances, without building
+        them. The category row value is already its primary key.
 
-        Raises:
-            ValidationError: If the stock quantity is negative.
+        Args:
+            rows (iterable): Dicts keyed by the serializer's field names.
 
         Returns:
-            int: The validated stock quantity value.
+            list: The serialized products.
         """
-        if value < 0:
-            raise serializers.ValidationError("Stock quantity cannot be\
-                                              negative.")
-        return value
+        converters = [
+            (name, None if isinstance(field, serializers.RelatedField)
+             else field.to_representation)
+            for name, field in cls().fields.items() if not field.write_only
+        ]
+        return [
+            {name: row[name] if convert is None or row[name] is None
+             else convert(row[name])
+             for name, convert in converters}
+            for row in rows
+        ]
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -153,10 +178,49 @@ class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        fields = '__all__'
+        fields = ['id', 'name', 'parent_category', 'description',
+                  'created_at', 'updated_at']
+
+    def validate_name(self, value):
+        """
+        Reject names that differ from an existing category only in case,
+        which the database would refuse as well.
+        """
+        # Checked on the primary, which a replica may lag behind
+        others = Category.objects.using('default').filter(name__iexact=value)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError("A category with this name already exists.")
+        return value
+
+    @classmethod
+    def optimized_queryset(cls):
+        """
+        Return the base queryset views should serialize categories from.
+
+        Only the serialized columns are loaded. The parent category is
+        rendered as its primary key, which is read from parent_category_id,
+        so it is not joined.
+
+        Returns:
+            QuerySet: Categories limited to the serialized columns.
+        """
+        return Category.objects.only(*cls.Meta.fields)
 
 
 class InventorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Inventory
-        fields = '__all__'
\ No newline at end of file
+        fields = ['id', 'product', 'stock_in', 'stock_out', 'current_stock',
+                  'last_updated']
+
+    @classmethod
+    def optimized_queryset(cls):
+        """
+        Return the base queryset views should serialize inventory from.
+
+        Returns:
+            QuerySet: Inventory rows with their product selected.
+        """
+        return Inventory.objects.select_related('product')
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Signals module for the api app.
+
+Signal receivers:
+- invalidate_checked_key: Drops the cached `ApiKey.check_key` lookup of a
+  key whenever it is saved or deleted, including deletes of whole
+  querysets and the cascade from deleting the key's owner.
+"""
+
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import ApiKey, CHECK_KEY_CACHE_KEY
+
+
+@receiver(post_save, sender=ApiKey)
+@receiver(post_delete, sender=ApiKey)
+def invalidate_checked_key(sender, instance, **kwargs):
+    """
+    Signal receiver that drops the cached lookup of an API key, so a
+    revoked or deleted key stops authenticating immediately.
+
+    Args:
+        sender (class): The model class (ApiKey) sending the signal.
+        instance (ApiKey): The instance saved or deleted.
+        **kwargs: Additional keyword arguments.
+    """
+    cache.delete(CHECK_KEY_CACHE_KEY.format(instance.hashed_key))
@@ -0,0 +1,18 @@
+from celery import shared_task
+from .usage import flush_usage
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_apikey_usage():
+    """
+    Task to write buffered API key usage counts back to the database.
+
+    Returns:
+        str: Status message with the number of keys updated
+    """
+    flushed = flush_usage()
+    logger.info(f"Flushed usage for {flushed} API keys")
+    return f"Flushed usage for {flushed} API keys"
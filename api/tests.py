@@ -1,3 +1,206 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+import jwt
+from jwt.utils import base64url_encode
+from user_management.models import User
+from .models import ApiKey
+from .usage import flush_usage
+from .utils import (JWTAuthentication, generate_token,
+                    generate_refresh_token, _encode)
 
 # Create your tests here.
+
+
+class ApiKeyTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email="owner@example.com", username="owner", password="ownerpass"
+        )
+        self.api_key = ApiKey.objects.create(owner=self.owner, app_id="app-1")
+
+    def tearDown(self):
+        cache.clear()
+
+    # Test that a valid key resolves to its owner in a single query
+    def test_check_key_returns_key_with_owner(self):
+        with self.assertNumQueries(1):
+            found = ApiKey.check_key(self.api_key.key)
+            self.assertEqual(found.owner.username, "owner")
+        self.assertEqual(found.pk, self.api_key.pk)
+
+    # Test that repeated lookups are served from the cache
+    def test_check_key_is_cached(self):
+        ApiKey.check_key(self.api_key.key)
+        with self.assertNumQueries(0):
+            found = ApiKey.check_key(self.api_key.key)
+        self.assertEqual(found.pk, self.api_key.pk)
+        self.assertEqual(found.owner_id, self.owner.pk)
+        self.assertTrue(found.is_active)
+
+    # Test that saving a key invalidates its cached lookup
+    def test_save_invalidates_cached_key(self):
+        ApiKey.check_key(self.api_key.key)
+        self.api_key.is_active = False
+        self.api_key.save()
+        self.assertIsNone(ApiKey.check_key(self.api_key.key))
+
+    # Test that bulk updates and deletes also drop cached lookups
+    def test_queryset_changes_invalidate_cached_key(self):
+        ApiKey.check_key(self.api_key.key)
+        ApiKey.objects.filter(pk=self.api_key.pk).update(is_active=False)
+        self.assertIsNone(ApiKey.check_key(self.api_key.key))
+
+        ApiKey.objects.filter(pk=self.api_key.pk).update(is_active=True)
+        ApiKey.check_key(self.api_key.key)
+        self.owner.delete()  # Cascades to the key
+        self.assertIsNone(ApiKey.check_key(self.api_key.key))
+
+    # Test that usage updates leave the cached lookup in place
+    def test_usage_update_keeps_cached_key(self):
+        ApiKey.check_key(self.api_key.key)
+        with self.assertNumQueries(1):
+            self.api_key.increment_usage()
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(ApiKey.check_key(self.api_key.key))
+
+    # Test that expiry is read from expires_at
+    def test_is_expired(self):
+        self.assertFalse(self.api_key.is_expired)
+        self.api_key.expires_at = timezone.now() - timedelta(minutes=1)
+        self.assertTrue(self.api_key.is_expired)
+
+    # Test that unknown and inactive keys are rejected
+    def test_check_key_rejects_unknown_and_inactive_keys(self):
+        self.assertIsNone(ApiKey.check_key("not-a-key"))
+        ApiKey.objects.filter(pk=self.api_key.pk).update(is_active=False)
+        self.assertIsNone(ApiKey.check_key(self.api_key.key))
+
+    # Test that expired keys are rejected, including cached ones
+    def test_check_key_rejects_expired_keys(self):
+        ApiKey.objects.filter(pk=self.api_key.pk).update(
+            expires_at=timezone.now() + timedelta(minutes=1))
+        self.assertIsNotNone(ApiKey.check_key(self.api_key.key))
+        with mock.patch('django.utils.timezone.now',
+                        return_value=timezone.now() + timedelta(minutes=2)):
+            with self.assertNumQueries(0):
+                self.assertIsNone(ApiKey.check_key(self.api_key.key))
+            cache.clear()
+            self.assertIsNone(ApiKey.check_key(self.api_key.key))
+
+    # Test that usage is written directly when the cache isn't shared
+    def test_increment_usage_without_shared_cache(self):
+        with self.assertNumQueries(1):
+            self.api_key.increment_usage()
+        self.api_key.refresh_from_db()
+        self.assertEqual(self.api_key.usage_count, 1)
+        self.assertIsNotNone(self.api_key.last_used)
+        self.assertEqual(flush_usage(), 0)
+
+    # Test that usage is buffered until it is flushed to the database
+    @override_settings(APIKEY_USAGE_BUFFERED=True)
+    def test_increment_usage_is_buffered_until_flush(self):
+        stale = ApiKey.objects.get(pk=self.api_key.pk)
+        with self.assertNumQueries(0):
+            self.api_key.increment_usage()
+            stale.increment_usage()
+
+        self.assertEqual(flush_usage(), 1)
+        self.api_key.refresh_from_db()
+        self.assertEqual(self.api_key.usage_count, 2)
+        self.assertIsNotNone(self.api_key.last_used)
+
+        # Already flushed uses are not counted twice, and idle keys
+        # aren't read at all
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_usage(), 0)
+        self.api_key.refresh_from_db()
+        self.assertEqual(self.api_key.usage_count, 2)
+
+        # A key used again after a flush is listed for the next one
+        self.api_key.increment_usage()
+        self.assertEqual(flush_usage(), 1)
+        self.api_key.refresh_from_db()
+        self.assertEqual(self.api_key.usage_count, 3)
+
+
+class JWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="jwt@example.com", username="jwt", password="jwtpass"
+        )
+        self.token = generate_token(self.user)
+        self.auth = JWTAuthentication()
+
+    def tearDown(self):
+        cache.clear()
+
+    # Test that tokens match the ones produced by PyJWT
+    def test_encode_matches_pyjwt(self):
+        payload = {
+            "user_id": str(self.user.id),
+            "exp": datetime(2030, 1, 1, tzinfo=dt_timezone.utc),
+            "iat": datetime(2029, 1, 1, tzinfo=dt_timezone.utc),
+        }
+        self.assertEqual(
+            _encode(payload),
+            jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+        )
+
+    # Test that the authenticated user is cached between requests
+    def test_authenticated_user_is_cached(self):
+        user, token = self.auth._authenticate_credentials(self.token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(token, self.token)
+        with self.assertNumQueries(0):
+            user, _ = self.auth._authenticate_credentials(self.token)
+        self.assertEqual(user.username, "jwt")
+
+    # Test that a decoded refresh token is reused and tampering is rejected
+    def test_decode_refresh_token(self):
+        refresh_token = generate_refresh_token(self.user)
+        self.assertEqual(JWTAuthentication.decode_refresh_token(refresh_token),
+                         str(self.user.id))
+        self.assertEqual(JWTAuthentication.decode_refresh_token(refresh_token),
+                         str(self.user.id))
+        with self.assertRaises(AuthenticationFailed):
+            JWTAuthentication.decode_refresh_token(refresh_token[:-2] + "xx")
+
+        # A forged payload under the cached token's signature is not a cache hit
+        header, _, signature = refresh_token.split('.')
+        forged = '.'.join([header, base64url_encode(b'{"user_id": "0"}').decode(), signature])
+        with self.assertRaises(AuthenticationFailed):
+            JWTAuthentication.decode_refresh_token(forged)
+
+    # Test that deactivating a user revokes their cached authentication
+    def test_deactivated_user_is_rejected(self):
+        self.auth._authenticate_credentials(self.token)
+        User.objects.remove_user("jwt@example.com")
+        with self.assertRaises(AuthenticationFailed):
+            self.auth._authenticate_credentials(self.token)
+
+
+class ApiViewTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    # Test that the status payload is served and reused within its TTL
+    def test_status_is_cached(self):
+        url = reverse('api_status')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['message'], "Status, OK")
+        second = self.client.get(url)
+        self.assertEqual(second.json(), first.json())
+
+    # Test that the root document is served as JSON without authentication
+    def test_root_view(self):
+        response = self.client.get(reverse('root_view'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['version'], 'v1')
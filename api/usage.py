@@ -0,0 +1,146 @@
+"""
+Buffered usage tracking for API keys.
+
+Recording a use only touches the cache: a counter and a last-used
+timestamp per key. The buffered values are written back to the database
+in bulk by `flush_usage`, which runs periodically from Celery beat.
+
+Buffering needs a cache shared by the web workers and the Celery workers,
+so it is only used when `APIKEY_USAGE_BUFFERED` is set, which the settings
+do whenever Redis is configured. Otherwise each use is written directly.
+
+Keys used since the last flush are listed in numbered slots: the first
+use of a key claims the next slot number with an atomic `incr` and writes
+the key's id into it. `flush_usage` reads only the slots added since its
+previous run, so idle keys cost nothing.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, Value, When, DateTimeField
+from django.utils import timezone
+
+USES_KEY = 'apikey:{}:uses'
+LAST_USED_KEY = 'apikey:{}:last_used'
+LAST_USED_TIMEOUT = 60 * 60 * 24  # a day is plenty between flushes
+FLUSH_BATCH_SIZE = 500
+
+PENDING_KEY = 'apikey:{}:pending'  # set while a key is listed in a slot
+PENDING_TIMEOUT = 60 * 10  # re-list keys whose slot went missing
+DIRTY_COUNT_KEY = 'apikey:dirty:count'
+DIRTY_SLOT_KEY = 'apikey:dirty:{}'
+DIRTY_SLOT_TIMEOUT = 60 * 60 * 24
+FLUSHED_KEY = 'apikey:dirty:flushed'
+RETRY_SLOTS_KEY = 'apikey:dirty:retry'
+
+
+def usage_is_buffered():
+    """
+    Whether API key usage is buffered in the cache.
+
+    Returns:
+        bool: True when the cache is shared with the flushing workers.
+    """
+    return getattr(settings, 'APIKEY_USAGE_BUFFERED', False)
+
+
+def record_use(api_key_id):
+    """
+    Record a single use of an API key in the cache.
+
+    Args:
+        api_key_id (int): The primary key of the API key that was used.
+    """
+    uses_key = USES_KEY.format(api_key_id)
+    cache.add(uses_key, 0, timeout=None)
+    try:
+        cache.incr(uses_key)
+    except ValueError:
+        # The counter was evicted between add() and incr()
+        cache.set(uses_key, 1, timeout=None)
+    cache.set(LAST_USED_KEY.format(api_key_id), timezone.now(),
+              timeout=LAST_USED_TIMEOUT)
+
+    # List the key for the next flush, once per flush
+    if cache.add(PENDING_KEY.format(api_key_id), True, timeout=PENDING_TIMEOUT):
+        cache.add(DIRTY_COUNT_KEY, 0, timeout=None)
+        slot = cache.incr(DIRTY_COUNT_KEY)
+        cache.set(DIRTY_SLOT_KEY.format(slot), api_key_id,
+                  timeout=DIRTY_SLOT_TIMEOUT)
+
+
+def flush_usage():
+    """
+    Write buffered usage counts and timestamps back to the database.
+
+    Only keys listed in slots added since the previous flush are read, in
+    batches, with one UPDATE per batch. Flushed counts are subtracted from
+    the cached counters rather than deleted, so uses recorded while the
+    flush is running are kept for the next one.
+
+    A slot that was claimed but not written yet is retried by the next
+    flush. If it is still missing then, its writer died; the key's pending
+    flag expires and its next use lists it again.
+
+    Returns:
+        int: The number of API keys whose usage was updated.
+    """
+    from .models import ApiKey
+
+    end = cache.get(DIRTY_COUNT_KEY, 0)
+    start = cache.get(FLUSHED_KEY, 0)
+    if end < start:
+        # The cache was cleared and the slot numbers started over
+        start = 0
+    slots = [*cache.get(RETRY_SLOTS_KEY, ()), *range(start + 1, end + 1)]
+    if not slots:
+        return 0
+
+    listed = cache.get_many([DIRTY_SLOT_KEY.format(n) for n in slots])
+    cache.set(RETRY_SLOTS_KEY, [n for n in range(start + 1, end + 1)
+                                if DIRTY_SLOT_KEY.format(n) not in listed],
+              timeout=None)
+    cache.set(FLUSHED_KEY, end, timeout=None)
+    cache.delete_many(list(listed))
+
+    ids = list(dict.fromkeys(listed.values()))
+    # Uses from here on list their key again for the next flush
+    cache.delete_many([PENDING_KEY.format(pk) for pk in ids])
+
+    flushed = 0
+    for i in range(0, len(ids), FLUSH_BATCH_SIZE):
+        flushed += _flush_batch(ApiKey, ids[i:i + FLUSH_BATCH_SIZE])
+    return flushed
+
+
+def _flush_batch(model, ids):
+    uses = cache.get_many([USES_KEY.format(pk) for pk in ids])
+    last_used = cache.get_many([LAST_USED_KEY.format(pk) for pk in ids])
+
+    counts = {}
+    for pk in ids:
+        count = uses.get(USES_KEY.format(pk))
+        if count:
+            counts[pk] = count
+    if not counts:
+        return 0
+
+    usage_whens = [When(pk=pk, then=Value(count))
+                   for pk, count in counts.items()]
+    last_used_whens = [
+        When(pk=pk, then=Value(last_used[LAST_USED_KEY.format(pk)],
+                               output_field=DateTimeField()))
+        for pk in counts if LAST_USED_KEY.format(pk) in last_used
+    ]
+    model.objects.filter(pk__in=counts).update(
+        usage_count=F('usage_count') + Case(*usage_whens, default=Value(0)),
+        last_used=Case(*last_used_whens, default=F('last_used'),
+                       output_field=DateTimeField())
+    )
+
+    for pk, count in counts.items():
+        try:
+            cache.decr(USES_KEY.format(pk), count)
+        except ValueError:
+            pass
+    return len(counts)
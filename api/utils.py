@@ -1,11 +1,93 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework import authentication, exceptions
 from datetime import datetime, timezone, timedelta
+from calendar import timegm
+from functools import cache as memoize
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_encode
+import hashlib
+import json
 import jwt
-from user_management.models import UserRole, RolePermission
 
 User = get_user_model()
+_USER_MANAGER = User.objects
+
+AUTH_USER_CACHE_KEY = 'auth_user:{}'
+AUTH_USER_CACHE_TIMEOUT = 60  # seconds
+AUTH_USER_FIELDS = ('id', 'username', 'email', 'is_active', 'is_staff')
+# The profile is joined in, so profile reads don't need their own query
+AUTH_PROFILE_FIELDS = ('profile__id', 'profile__user', 'profile__bio', 'profile__avatar')
+
+REFRESH_TOKEN_CACHE_KEY = 'refresh_token:{}'
+REFRESH_TOKEN_CACHE_TIMEOUT = 300  # seconds
+
+
+def load_auth_user(user_id):
+    """
+    Load the user for an authenticated request, using a short-lived cache.
+
+    Only the columns in `AUTH_USER_FIELDS` are loaded, along with the
+    user's profile; any other field is fetched from the database on first
+    access. Cached entries are dropped whenever the user or their profile
+    is saved or deleted.
+
+    Args:
+        user_id (str): The ID of the user taken from the token payload.
+
+    Returns:
+        User: The matching user.
+
+    Raises:
+        User.DoesNotExist: If no user with that ID exists.
+    """
+    cache_key = AUTH_USER_CACHE_KEY.format(user_id)
+    user = cache.get(cache_key)
+    if user is None:
+        user = _USER_MANAGER.select_related('profile').only(
+            *AUTH_USER_FIELDS, *AUTH_PROFILE_FIELDS).get(pk=user_id)
+        cache.set(cache_key, user, AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+ACCESS_TOKEN_LIFETIME = timedelta(hours=24)
+REFRESH_TOKEN_LIFETIME = timedelta(days=7)
+
+_HS256 = get_default_algorithms()["HS256"]
+_JWT_HEADER = base64url_encode(
+    json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+
+@memoize
+def _signing_key():
+    """Prepare the HMAC signing key once, on first use."""
+    return _HS256.prepare_key(settings.SECRET_KEY)
+
+
+def _encode(payload):
+    """
+    Encode and sign a payload as an HS256 JSON Web Token.
+
+    Produces the same token as `jwt.encode(payload, SECRET_KEY, "HS256")`
+    but skips PyJWT's per-call algorithm lookup and key preparation.
+
+    Args:
+    payload (dict): The claims to encode. Datetime values are converted
+    to integer timestamps.
+
+    Returns:
+    str: The encoded JWT.
+    """
+    claims = {
+        name: timegm(value.utctimetuple()) if isinstance(value, datetime) else value
+        for name, value in payload.items()
+    }
+    signing_input = _JWT_HEADER + b"." + base64url_encode(
+        json.dumps(claims, separators=(",", ":")).encode())
+    signature = _HS256.sign(signing_input, _signing_key())
+    return (signing_input + b"." + base64url_encode(signature)).decode()
+
 
 def generate_token(user):
     """
@@ -18,13 +100,14 @@ def generate_token(user):
     str: The generated JWT.
     """
     user_id = str(user.id)
+    now = datetime.now(timezone.utc)
     payload = {
         "user_id": user_id,
-        "exp": datetime.now(timezone.utc) + timedelta(hours=24),
-        'iat': datetime.now(timezone.utc)   
+        "exp": now + ACCESS_TOKEN_LIFETIME,
+        'iat': now
 	}
     
-    access_token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+    access_token = _encode(payload)
     return access_token
 
 
@@ -43,14 +126,14 @@ def generate_refresh_token(user):
         str: The generated JWT as a string.
     """
     user_id = str(user.id)
+    now = datetime.now(timezone.utc)
     payload = {
         "user_id": user_id,
-        "exp": datetime.now(timezone.utc) + timedelta(days=7),
-        'iat': datetime.now(timezone.utc)
-        
+        "exp": now + REFRESH_TOKEN_LIFETIME,
+        'iat': now
 	}
     
-    refresh_token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+    refresh_token = _encode(payload)
     return refresh_token
 
 
@@ -84,27 +167,49 @@ class JWTAuthentication(authentication.BaseAuthentication):
 
     def _authenticate_credentials(self, token):
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+            payload = jwt.decode(token, _signing_key(), algorithms=["HS256"])
         except jwt.ExpiredSignatureError:
             raise exceptions.AuthenticationFailed('Token has expired')
         except jwt.InvalidTokenError:
             raise exceptions.AuthenticationFailed('Invalid token')
 
         try:
-            user = User.objects.get(id=payload['user_id'])
+            user = load_auth_user(payload['user_id'])
         except User.DoesNotExist:
             raise exceptions.AuthenticationFailed('User not found')
 
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User is deactivated')
+
         return (user, token)
     
     
     @staticmethod
     def decode_refresh_token(token):
+        """
+        Validate a refresh token and return the ID of its user.
+
+        Successfully decoded tokens are cached by a hash of the whole token
+        for up to `REFRESH_TOKEN_CACHE_TIMEOUT` seconds, and never past their
+        own expiry, so repeated refreshes skip the HMAC check and JSON
+        parsing. Only the exact token that was verified hits the cache.
+        """
+        cache_key = REFRESH_TOKEN_CACHE_KEY.format(
+            hashlib.sha256(token.encode()).hexdigest())
+        user_id = cache.get(cache_key)
+        if user_id is not None:
+            return user_id
+
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            return payload['user_id']
+            payload = jwt.decode(token, _signing_key(), algorithms=["HS256"])
         except jwt.ExpiredSignatureError:
             raise exceptions.AuthenticationFailed("Refresh token has expired")
         except jwt.InvalidTokenError:
             raise exceptions.AuthenticationFailed('Invalid Refresh Token')
+
+        remaining = int(payload['exp'] - datetime.now(timezone.utc).timestamp())
+        timeout = min(REFRESH_TOKEN_CACHE_TIMEOUT, remaining)
+        if timeout > 0:
+            cache.set(cache_key, payload['user_id'], timeout)
+        return payload['user_id']
    
@@ -2,11 +2,31 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views import View
 from django.utils import timezone
-from datetime import timedelta
+import json
 
 
 SERVER_START_TIME = timezone.now()
+STATUS_CACHE_KEY = 'api_status'
+STATUS_CACHE_TIMEOUT = 1  # second
+
+API_ROOT_JSON = json.dumps({
+    'message': 'Welcome to the InventoryWise API',
+    'version': 'v1',
+    'base_url': '',
+    'documentation': '',
+    'services': {
+        'user_management_service': {
+            'available_endpoints': {}
+        },
+        'product_management_service': {
+            'available_endpoints': {}
+        }
+    }
+}).encode()
 
 def format_uptime(uptime_duration):
     """
@@ -22,24 +42,31 @@ def format_uptime(uptime_duration):
     uptime_str = f"{weeks} weeks, {days} days, {hours} hours, {minutes} minutes, {seconds} seconds"
     return uptime_str
 
+
+def build_status():
+    """
+    Builds the status payload returned by the status endpoint.
+    """
+    current_time = timezone.now()
+    uptime_duration = current_time - SERVER_START_TIME
+
+    return {
+        "message": "Status, OK",
+        "api_version": "v1.0.0",
+        "server_time": current_time.strftime('%H:%M:%S, %Y-%m-%d'),
+        "uptime": format_uptime(uptime_duration),
+        "status_code": status.HTTP_200_OK,
+    }
+
 class ApiStatusView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
-        formatted_time = timezone.now().strftime('%H:%M:%S, %Y-%m-%d')
-        
-        current_time = timezone.now()
-        uptime_duration = current_time - SERVER_START_TIME
-
-        uptime_str = format_uptime(uptime_duration)
-        
-        return Response({
-            "message": "Status, OK",
-            "api_version": "v1.0.0",
-            "server_time": formatted_time,
-            "uptime": uptime_str, 
-            "status_code": status.HTTP_200_OK,
-        }, status=status.HTTP_200_OK)
+        # Probes hit this endpoint many times a second, so the payload is
+        # shared for a second instead of being rebuilt on every request.
+        payload = cache.get_or_set(STATUS_CACHE_KEY, build_status,
+                                   STATUS_CACHE_TIMEOUT)
+        return Response(payload, status=status.HTTP_200_OK)
         
     def post(self, request):
         """Explicitly handle unsupported POST method."""
@@ -54,25 +81,13 @@ class ApiStatusView(APIView):
         }, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-class ApiRootView(APIView):
-    permission_classes = [AllowAny]
-    
+class ApiRootView(View):
+    """
+    Serves the static API root document.
+
+    The payload never changes, so it is encoded once at import and served
+    without going through DRF's negotiation and rendering.
+    """
+
     def get(self, request):
-        return Response({
-            'message': 'Welcome to the InventoryWise API',
-            'version': 'v1',
-            'base_url': '',
-            'documentation': '',
-            'services': {
-                'user_management_service': {
-                    'available_endpoints': {
-                        
-                    }
-                },
-                'product_management_service': {
-                    'available_endpoints': {
-                        
-                    }
-                }
-            }
-        })
\ No newline at end of file
+        return HttpResponse(API_ROOT_JSON, content_type='application/json')
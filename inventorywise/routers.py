@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import connections
+
+
+class ReplicaRouter:
+    """
+    Database router that sends catalog reads to a read replica.
+
+    Product and category reads go to the 'replica' database when one is
+    configured; everything else, and every write, goes to 'default'.
+    Reads made while a transaction is open on 'default' stay there too,
+    so they see that transaction's writes. Code that reads back its own
+    writes outside a transaction pins the read with `using('default')`.
+    """
+
+    replica_models = {
+        ('product_management_service', 'product'),
+        ('product_management_service', 'category'),
+    }
+
+    def db_for_read(self, model, **hints):
+        if 'replica' not in settings.DATABASES:
+            return None
+        if connections['default'].in_atomic_block:
+            return None
+        if (model._meta.app_label, model._meta.model_name) in self.replica_models:
+            return 'replica'
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Objects read from the replica are saved back to the primary
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica mirrors the primary, so rows from either may be related
+        return {obj1._state.db, obj2._state.db} <= {'default', 'replica'}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema from the primary
+        return db != 'replica'
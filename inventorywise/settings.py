@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
 from celery.schedules import crontab
@@ -106,9 +107,28 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse connections across requests instead of reconnecting each time
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        # Behind a transaction-pooling pgbouncer, a cursor can't outlive
+        # its transaction, so .iterator() must not use server-side cursors
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DATABASE_TRANSACTION_POOLING', 'False') == 'True',
     }
 }
 
+# Product and category reads are served from a read replica when
+# REPLICA_DATABASE_NAME is set; see inventorywise/routers.py.
+REPLICA_DATABASE_NAME = os.getenv('REPLICA_DATABASE_NAME')
+
+if REPLICA_DATABASE_NAME:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': REPLICA_DATABASE_NAME,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['inventorywise.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -128,6 +148,11 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Test fixtures create many users, so tests hash passwords with a fast hasher
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+if TESTING:
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -169,11 +194,37 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache Configuration
+# Redis is used when REDIS_CACHE_URL is set, so buffered counters and cached
+# lookups are shared between workers; local memory is the fallback.
+REDIS_CACHE_URL = os.getenv('REDIS_CACHE_URL')
+
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# API key usage is buffered in the cache only when workers share it
+APIKEY_USAGE_BUFFERED = bool(REDIS_CACHE_URL)
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'  # Redis as broker
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'  # Redis as backend (optional)
 
 CELERY_BEAT_SCHEDULE = {
+    'refresh-low-stock-products': {
+        'task': 'product_management_service.tasks.refresh_low_stock_products',
+        'schedule': crontab(hour='5,11,17', minute=55),  # ahead of each report
+    },
     'send-stock-report-6am': {
         'task': 'product_management_service.tasks.send_stock_report',
         'schedule': crontab(hour=6, minute=0),
@@ -186,10 +237,22 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'product_management_service.tasks.send_stock_report',
         'schedule': crontab(hour=18, minute=0),
     },
+    'flush-apikey-usage': {
+        'task': 'api.tasks.flush_apikey_usage',
+        'schedule': 60.0,  # every minute
+    },
 }
 
 CELERY_TIMEZONE = 'Africa/Accra'
 
+# CPU-bound PDF rendering and I/O-bound email sending run on their own
+# queues, e.g. `celery -A inventorywise worker -Q pdf --pool=prefork` and
+# `celery -A inventorywise worker -Q celery,email`
+CELERY_TASK_ROUTES = {
+    'product_management_service.tasks.render_low_stock_pdf': {'queue': 'pdf'},
+    'product_management_service.tasks.send_low_stock_email': {'queue': 'email'},
+}
+
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -0,0 +1,20 @@
+import django_filters
+from .models import Product, to_cents
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Filters for the product list.
+
+    `?price=` is matched against the indexed integer price_cents column
+    rather than the decimal price column.
+    """
+
+    price = django_filters.NumberFilter(method='filter_price')
+
+    class Meta:
+        model = Product
+        fields = ['category']
+
+    def filter_price(self, queryset, name, value):
+        return queryset.filter(price_cents=to_cents(value))
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0007_product_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockProduct',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='product_management_service.product')),
+                ('name', models.CharField(max_length=100)),
+                ('stock_quantity', models.PositiveIntegerField()),
+                ('min_stock_threshold', models.PositiveIntegerField()),
+                ('max_stock_threshold', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
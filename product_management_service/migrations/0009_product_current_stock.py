@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:31
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def copy_current_stock(apps, schema_editor):
+    Product = apps.get_model('product_management_service', 'Product')
+    Inventory = apps.get_model('product_management_service', 'Inventory')
+    db_alias = schema_editor.connection.alias
+    Product.objects.using(db_alias).update(current_stock=Coalesce(
+        Subquery(Inventory.objects.filter(product=OuterRef('pk')).values('current_stock')[:1]),
+        F('stock_quantity')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0008_lowstockproduct'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='low_stock_idx',
+        ),
+        migrations.RenameField(
+            model_name='lowstockproduct',
+            old_name='stock_quantity',
+            new_name='current_stock',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='current_stock',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(copy_current_stock, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['current_stock', 'min_stock_threshold'], name='low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0009_product_current_stock'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='inventorymovement',
+            options={'ordering': ['-timestamp']},
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['product', '-timestamp'], name='movement_product_time_idx'),
+        ),
+    ]
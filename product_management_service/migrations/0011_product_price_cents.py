@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:34
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+
+def fill_price_cents(apps, schema_editor):
+    Product = apps.get_model('product_management_service', 'Product')
+    db_alias = schema_editor.connection.alias
+    products = list(Product.objects.using(db_alias).only('id', 'price'))
+    for product in products:
+        product.price_cents = int((product.price * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    Product.objects.using(db_alias).bulk_update(products, ['price_cents'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0010_inventorymovement_product_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='price_cents',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(fill_price_cents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0011_product_price_cents'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='product',
+            name='positive_price',
+        ),
+        migrations.RemoveConstraint(
+            model_name='product',
+            name='positive_stock_quantity',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='low_stock_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('current_stock__lte', models.F('min_stock_threshold'))), fields=['id'], name='low_stock_partial'),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.CheckConstraint(check=models.Q(('price__gte', 0), ('stock_quantity__gte', 0)), name='nonneg_price_and_stock'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:37
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0012_product_combined_constraint'),
+    ]
+
+    operations = [
+        # A column can't be altered into a generated one, so it is recreated
+        migrations.RemoveField(
+            model_name='inventory',
+            name='current_stock',
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='current_stock',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('stock_in'), '-', models.F('stock_out')), output_field=models.IntegerField()),
+        ),
+    ]
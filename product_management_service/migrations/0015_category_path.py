@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-15 20:40
+
+from django.db import migrations, models
+
+
+def fill_category_paths(apps, schema_editor):
+    Category = apps.get_model('product_management_service', 'Category')
+    db_alias = schema_editor.connection.alias
+    categories = list(Category.objects.using(db_alias).only('id', 'parent_category_id'))
+    children = {}
+    for category in categories:
+        children.setdefault(category.parent_category_id, []).append(category)
+
+    # Walk down from the root categories so parents get their path first
+    level = [(category, str(category.pk), 0) for category in children.get(None, [])]
+    while level:
+        next_level = []
+        for category, path, depth in level:
+            category.path, category.depth = path, depth
+            next_level.extend(
+                (child, f'{path}/{child.pk}', depth + 1)
+                for child in children.get(category.pk, [])
+            )
+        level = next_level
+    Category.objects.using(db_alias).bulk_update(categories, ['path', 'depth'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0014_product_uniq_nonempty_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_category_paths, migrations.RunPython.noop),
+    ]
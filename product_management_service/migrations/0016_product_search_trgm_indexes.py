@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-15 21:30
+
+from django.db import migrations
+
+# Product search runs icontains lookups, which PostgreSQL compiles to
+# UPPER(column::text) LIKE UPPER(...). Trigram indexes on that same
+# expression let those LIKE '%term%' scans use an index.
+TRGM_INDEXES = {
+    'prod_name_trgm': 'name',
+    'prod_sku_trgm': 'sku',
+}
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Product = apps.get_model('product_management_service', 'Product')
+    qn = schema_editor.quote_name
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRGM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {qn(name)} ON {qn(Product._meta.db_table)} '
+            f'USING gin ((UPPER({qn(column)}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRGM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0015_category_path'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-15 21:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def rename_case_duplicate_categories(apps, schema_editor):
+    Category = apps.get_model('product_management_service', 'Category')
+    db_alias = schema_editor.connection.alias
+    seen = set()
+    renamed = []
+    # The oldest category keeps its name; later ones differing only in case
+    # get their id appended, so the case-insensitive constraint can be added
+    for category in Category.objects.using(db_alias).only('id', 'name').order_by('pk'):
+        if category.name.upper() in seen:
+            suffix = f' ({category.pk})'
+            while category.name.upper() in seen:
+                category.name = category.name[:255 - len(suffix)] + suffix
+            renamed.append(category)
+        seen.add(category.name.upper())
+    Category.objects.using(db_alias).bulk_update(renamed, ['name'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product_management_service', '0016_product_search_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_case_duplicate_categories, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('name'), name='category_upper_name_uniq'),
+        ),
+    ]
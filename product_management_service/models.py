@@ -1,8 +1,26 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr, Upper
 from django.utils import timezone
+from decimal import Decimal, ROUND_HALF_UP
 
 # Create your models here.
 
+
+def to_cents(amount):
+    """
+    Convert a price to a whole number of cents, rounding half up.
+
+    Args:
+        amount (Decimal | float | int | str): The price to convert.
+
+    Returns:
+        int: The price in cents.
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
 class Category(models.Model):
     """
     Represents a category of products.
@@ -12,6 +30,10 @@ class Category(models.Model):
         parent_category (ForeignKey): A reference to the parent category,
         allowing for nested categories.
         description (str): A brief description of the category.
+        path (str): The primary keys from the root category down to this
+        one, joined by '/', maintained on save. Descendants are found with
+        a single `path__startswith` lookup.
+        depth (int): The number of ancestors of the category.
         created_at (datetime): The timestamp when the category was created.
         updated_at (datetime): The timestamp when the category was last
         updated.
@@ -20,15 +42,95 @@ class Category(models.Model):
     name = models.CharField(max_length=255, unique=True)
     parent_category = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subcategories')
     description = models.TextField(null=False, default='No description provided')
+    path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)  # Materialized path
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        """
+        Override the save method to keep the materialized path in sync.
+
+        The path is built from primary keys, so a new category is inserted
+        before its path is written. When a category moves to another parent,
+        the paths of all its descendants are rewritten in a single UPDATE.
+        """
+        old_path, old_depth = self.path, self.depth
+        super().save(*args, **kwargs)
+
+        parent = self.parent_category
+        path = f'{parent.path}/{self.pk}' if parent else str(self.pk)
+        if path == old_path:
+            return
+        depth = parent.depth + 1 if parent else 0
+        Category.objects.filter(pk=self.pk).update(path=path, depth=depth)
+        if old_path:
+            Category.objects.filter(path__startswith=f'{old_path}/').update(
+                path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (depth - old_depth)
+            )
+        self.path, self.depth = path, depth
+
+    @classmethod
+    def delete_all(cls):
+        """
+        Delete every category, along with the products and inventory
+        records that cascade from them.
+
+        On PostgreSQL this is a single TRUNCATE ... CASCADE. Every relation
+        below Category cascades on delete, so it removes the same rows as
+        the ORM would, without collecting them in Python or sending delete
+        signals. Other databases fall back to the ORM delete.
+        """
+        if connection.vendor != 'postgresql':
+            cls.objects.all().delete()
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE TABLE {connection.ops.quote_name(cls._meta.db_table)} CASCADE")
+
     def __str__(self):
         return self.name
 
     # Order by name by default
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                Upper('name'), name='category_upper_name_uniq'
+            ),  # Names are matched case-insensitively
+        ]
+
+
+class ProductManager(models.Manager):
+    """
+    Manager for products with a bulk import path.
+    """
+
+    def bulk_ingest(self, products, batch_size=1000):
+        """
+        Create many products and their inventory entries at once.
+
+        bulk_create skips save() and the post_save signal, so the inventory
+        entries the signal would create one by one are inserted in bulk here
+        instead.
+
+        Args:
+            products (list[Product]): Unsaved products to create.
+            batch_size (int): Maximum number of rows per INSERT.
+
+        Returns:
+            list[Product]: The created products.
+        """
+        for product in products:
+            product.price_cents = to_cents(product.price)
+            product.current_stock = product.stock_quantity
+        with transaction.atomic(using=self.db):
+            products = self.bulk_create(products, batch_size=batch_size)
+            Inventory.objects.using(self.db).bulk_create([
+                Inventory(product=product, stock_in=product.stock_quantity)
+                for product in products
+            ], batch_size=batch_size)
+        return products
 
 
 class Product(models.Model):
@@ -40,20 +142,25 @@ class Product(models.Model):
         name (str): The name of the product.
         description (str): A brief description of the product.
         price (Decimal): The price of the product (must be non-negative).
+        price_cents (int): The price in cents, kept in sync with price on save
+        for cheap integer filtering.
         stock_quantity (PositiveIntegerField): The quantity of the product in stock (must be positive).
         category (ForeignKey): A reference to the category the product belongs to.
         barcode (str): An optional barcode for the product.
         min_stock_threshold (PositiveIntegerField): The minimum stock level to trigger a low-stock alert.
         max_stock_threshold (PositiveIntegerField): The maximum stock level to trigger a surplus alert.
+        current_stock (PositiveIntegerField): Copy of the inventory's current stock, kept in sync
+        by the inventory signals and stock movements so reads don't need to join Inventory.
         created_at (datetime): The timestamp when the product was created.
         updated_at (datetime): The timestamp when the product was last updated.
     """
 
-    sku = models.CharField(max_length=50, unique=True, blank=True)  # SKU must be unique
+    sku = models.CharField(max_length=50, blank=True)  # Non-blank SKUs must be unique
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     # Non-negative price
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    price_cents = models.BigIntegerField(default=0, db_index=True)  # Derived from price
     stock_quantity = models.PositiveIntegerField(default=0)  # Positive stock quantity
     category = models.ForeignKey(
         Category,
@@ -63,23 +170,48 @@ class Product(models.Model):
     barcode = models.CharField(max_length=100, blank=True)
     min_stock_threshold = models.PositiveIntegerField(default=10)
     max_stock_threshold = models.PositiveIntegerField(default=100)
+    current_stock = models.PositiveIntegerField(default=0)  # Denormalized from Inventory
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductManager()
+
     class Meta:
         constraints = [
             models.CheckConstraint(
-                check=models.Q(price__gte=0),
-                name='positive_price'
-            ),  # Price can't be negative
-            models.CheckConstraint(
-                check=models.Q(stock_quantity__gte=0),
-                name='positive_stock_quantity'
-            )  # Stock quantity must be positive
+                check=models.Q(price__gte=0) & models.Q(stock_quantity__gte=0),
+                name='nonneg_price_and_stock'
+            ),  # Price can't be negative and stock quantity must be positive
+            models.UniqueConstraint(
+                fields=['sku'],
+                condition=~models.Q(sku=''),
+                name='uniq_nonempty_sku'
+            )  # Blank SKUs are left out of the unique index
+        ]
+        indexes = [
+            models.Index(fields=['name'], name='product_name_idx'),
+            models.Index(fields=['category', 'stock_quantity'],
+                         name='product_category_stock_idx'),
+            models.Index(fields=['id'], name='low_stock_partial',
+                         condition=models.Q(current_stock__lte=F('min_stock_threshold'))),  # Low stock report filter
         ]
         # Order by name by default
         ordering = ['name']
-        
+
+    def save(self, *args, **kwargs):
+        """
+        Override the save method to keep price_cents in sync with price and
+        to start current_stock at the initial stock quantity, since nothing
+        has been taken out of a new product yet.
+        """
+        self.price_cents = to_cents(self.price)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'price' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'price_cents'}
+        if self._state.adding:
+            self.current_stock = self.stock_quantity
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.name} (SKU: {self.sku})'
 
@@ -99,47 +231,54 @@ class ProductVariant(models.Model):
 
     def __str__(self):
         return f'{self.product.name} - {self.variant_name}: {self.variant_value}'
-    
+
+
+class InventoryManager(models.Manager):
+    """
+    Manager for inventory records that always joins the related product,
+    so displaying a list of records doesn't query each product separately.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('product')
+
 
 class Inventory(models.Model):
     """
     Tracks stock movements in and out of inventory for a given product.
     """
+    objects = InventoryManager()
+
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='inventory')
     stock_in = models.PositiveIntegerField(default=0)
     stock_out = models.PositiveIntegerField(default=0)
-    current_stock = models.PositiveIntegerField(default=0)
+    # Computed and stored by the database whenever stock_in or stock_out change
+    current_stock = models.GeneratedField(
+        expression=F('stock_in') - F('stock_out'),
+        output_field=models.IntegerField(),
+        db_persist=True
+    )
     last_updated = models.DateTimeField(auto_now=True)
-    
-    def save(self, *args, **kwargs):
-        """
-        Override the save method to update current_stock before saving.
-        """
-        self.current_stock = self.stock_in - self.stock_out
-        super().save(*args, **kwargs)
-        
-    def update_stock(self):
-        """
-        Automatically updates the current stock based on incoming and outgoing movements.
-        """
-        self.current_stock = self.stock_in - self.stock_out
-        self.save()
-        
+
     def add_stock(self, quantity):
         """
         Add stock to the inventory and log the movement.
         """
-        self.stock_in += quantity
-        InventoryMovement.objects.create(product=self.product, movement_type='IN', quantity=quantity)
-        self.update_stock()
-        
+        with transaction.atomic():
+            Inventory.objects.filter(pk=self.pk).update(stock_in=F('stock_in') + quantity)
+            Product.objects.filter(pk=self.product_id).update(current_stock=F('current_stock') + quantity)
+            InventoryMovement.objects.create(product_id=self.product_id, movement_type='IN', quantity=quantity)
+        self.refresh_from_db(fields=['stock_in', 'stock_out', 'current_stock'])
+
     def remove_stock(self, quantity):
         """
         Remove stock from the inventory and log the movement.
         """
-        self.stock_out += quantity
-        InventoryMovement.objects.create(product=self.product, movement_type='OUT', quantity=quantity)
-        self.update_stock()
+        with transaction.atomic():
+            Inventory.objects.filter(pk=self.pk).update(stock_out=F('stock_out') + quantity)
+            Product.objects.filter(pk=self.product_id).update(current_stock=F('current_stock') - quantity)
+            InventoryMovement.objects.create(product_id=self.product_id, movement_type='OUT', quantity=quantity)
+        self.refresh_from_db(fields=['stock_in', 'stock_out', 'current_stock'])
 
     def __str__(self):
         return f'Product: {self.product.name} - Stock-In: {self.stock_in} - Stock-Out: {self.stock_out} - Current Stock: {self.current_stock}'
@@ -149,12 +288,82 @@ class InventoryMovement(models.Model):
     """
     Records every movement (in or out) of inventory to track stock changes.
     """
+    objects = InventoryManager()
 
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='movements')
     movement_type = models.CharField(max_length=10, choices=[('IN', 'Stock In'), ('OUT', 'Stock Out')])
     quantity = models.PositiveIntegerField(default=0)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', '-timestamp'],
+                         name='movement_product_time_idx'),  # Stock history per product
+        ]
+        # Newest movements first
+        ordering = ['-timestamp']
+
     def __str__(self):
         return f'{self.product.name} - {self.movement_type}: {self.quantity} units on {self.timestamp}'
 
+
+LOW_STOCK_REFRESHED_CACHE_KEY = 'low_stock_snapshot_refreshed'
+LOW_STOCK_SNAPSHOT_MAX_AGE = 60 * 60  # seconds; refreshes run 5 minutes ahead
+
+
+class LowStockProduct(models.Model):
+    """
+    Snapshot of the products at or below their minimum stock threshold.
+
+    The snapshot is rebuilt by the `refresh_low_stock_products` task shortly
+    before each stock report, so the report reads this small table instead
+    of scanning every product. A refresh is remembered in the cache for
+    `LOW_STOCK_SNAPSHOT_MAX_AGE` seconds; after that the snapshot counts
+    as stale.
+    """
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    name = models.CharField(max_length=100)
+    current_stock = models.PositiveIntegerField()
+    min_stock_threshold = models.PositiveIntegerField()
+    max_stock_threshold = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['name']
+
+    @classmethod
+    def refresh(cls):
+        """
+        Rebuild the snapshot from the product table in a single
+        INSERT ... SELECT, without loading any rows into Python.
+        """
+        columns = ['product_id', 'name', 'current_stock', 'min_stock_threshold', 'max_stock_threshold']
+        source = ['id', 'name', 'current_stock', 'min_stock_threshold', 'max_stock_threshold']
+        qn = connection.ops.quote_name
+        sql = (
+            f"INSERT INTO {qn(cls._meta.db_table)} ({', '.join(map(qn, columns))}) "
+            f"SELECT {', '.join(map(qn, source))} FROM {qn(Product._meta.db_table)} "
+            f"WHERE {qn('current_stock')} <= {qn('min_stock_threshold')}"
+        )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+        cache.set(LOW_STOCK_REFRESHED_CACHE_KEY, timezone.now(), LOW_STOCK_SNAPSHOT_MAX_AGE)
+
+    @classmethod
+    def refresh_if_stale(cls):
+        """
+        Rebuild the snapshot unless it was refreshed recently, e.g. when
+        the refresh task hasn't run since a deploy or a worker outage.
+
+        Returns:
+            bool: True if the snapshot was stale and has been rebuilt.
+        """
+        if cache.get(LOW_STOCK_REFRESHED_CACHE_KEY) is not None:
+            return False
+        cls.refresh()
+        return True
+
+    def __str__(self):
+        return f'{self.name}: {self.current_stock} (Minimum: {self.min_stock_threshold})'
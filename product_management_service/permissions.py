@@ -1,4 +1,6 @@
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from user_management.permissions import has_permission
 
 
 class IsAdminOrReadOnly(BasePermission):
@@ -13,3 +15,35 @@ class IsAdminOrReadOnly(BasePermission):
             return True
         # Write permissions are only allowed for admin users
         return request.user and request.user.is_staff
+
+
+class RolePermissionDenied(PermissionDenied):
+    """
+    A 403 with the `{"message", "status_code"}` body the API's views
+    return, rather than DRF's `{"detail"}`.
+    """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.detail = {"message": self.detail, "status_code": self.status_code}
+
+
+class HasRolePermission(BasePermission):
+    """
+    Checks the user's role permissions against the view's
+    `required_permissions`, a mapping of HTTP method to a
+    `(permission, denied message)` pair. HEAD and OPTIONS follow GET.
+
+    Denials are raised as `RolePermissionDenied`, so they have the same
+    body as the views that check permissions themselves.
+    """
+
+    def has_permission(self, request, view):
+        method = 'GET' if request.method in SAFE_METHODS else request.method
+        required = view.required_permissions.get(method)
+        if required is None:
+            return True
+        permission, message = required
+        if not has_permission(request.user, permission):
+            raise RolePermissionDenied(message)
+        return True
@@ -0,0 +1,158 @@
+"""
+Stock report rendering.
+
+Kept apart from `utils` so that importing the view helpers doesn't load
+xhtml2pdf and ReportLab; only the report task needs them, and even there
+they are imported on the first render.
+"""
+
+from django.conf import settings
+from django.template.loader import get_template
+from io import BytesIO
+import logging
+import os
+from datetime import datetime
+from operator import itemgetter
+
+logger = logging.getLogger(__name__)
+
+PDF_SHELL_TEMPLATE = 'emails/stock_report_pdf.html'
+# CSS class and label of each stock status in the PDF report
+STOCK_STATUSES = {
+    'critical': ('status-critical', 'Out of Stock'),
+    'low': ('status-warning', 'Low Stock'),
+    'normal': ('status-normal', 'Normal'),
+}
+
+
+def get_static_file_path(filename):
+    """Helper function to get the absolute path of static files."""
+    return os.path.join(settings.STATIC_ROOT, filename)
+
+
+def prepare_report_data(report_data):
+    """
+    Prepares and enriches the report data with additional calculations
+    
+    Args:
+        report_data (list): Raw report data
+        
+    Returns:
+        tuple: Enriched report data and context dictionary
+    """
+    if not isinstance(report_data, list):
+        raise ValueError("report_data must be a list")
+        
+    # Validate and enrich every item, accumulating the totals in one pass
+    required_fields = {'name', 'current_stock', 'min_threshold'}
+    low_stock_count = 0
+    total_value = 0
+    pct_sum = 0
+    items_below_50 = 0
+    for item in report_data:
+        if not item.keys() >= required_fields:
+            raise ValueError(f"Missing required fields: {required_fields - item.keys()}")
+
+        # Read each value once; the arithmetic below runs on locals
+        stock = item['current_stock']
+        threshold = item['min_threshold']
+        pct = stock / threshold * 100 if threshold > 0 else 100.0
+        is_low = stock <= threshold
+        item['stock_level_pct'] = pct
+        item['is_low_stock'] = is_low
+        # Resolved here so the template prints them without nested conditions
+        item['status_class'], item['status_label'] = (
+            STOCK_STATUSES['critical' if stock == 0 else 'low'] if is_low
+            else STOCK_STATUSES['normal']
+        )
+
+        low_stock_count += is_low
+        total_value += stock * item.get('unit_price', 0)
+        pct_sum += pct
+        items_below_50 += pct < 50
+            
+    # Sort data with low stock items first; with none, the name alone decides
+    sort_key = itemgetter('is_low_stock', 'name') if low_stock_count else itemgetter('name')
+    sorted_data = sorted(report_data, key=sort_key, reverse=True)
+    
+    low_stock_items = sorted_data[:low_stock_count]
+    
+    critical_items = [
+        item for item in low_stock_items 
+        if item['current_stock'] == 0
+    ]
+    
+    avg_stock_level = pct_sum / len(sorted_data) if sorted_data else 0
+    
+    context = {
+        'report': sorted_data,
+        'generated_at': datetime.now(),
+        'company_name': getattr(settings, 'COMPANY_NAME', 'InventoryWise'),
+        'total_products': len(report_data),
+        'low_stock_count': low_stock_count,
+        'low_stock_items': low_stock_items,
+        'critical_items_count': len(critical_items),
+        'critical_items': critical_items,
+        'total_inventory_value': total_value,
+        'report_type': 'Low Stock Alert' if low_stock_items else 'Stock Report',
+        'report_summary': {
+            'avg_stock_level': avg_stock_level,
+            'items_below_50_pct': items_below_50
+        }
+    }
+    
+    return sorted_data, context
+
+def generate_pdf_report(report_data, template_name='emails/stock_report_template.html'):
+    """
+    Generates a PDF report from stock data with proper styling and formatting.
+
+    The report body is rendered inside `PDF_SHELL_TEMPLATE`, which holds
+    the page styles and footer, so the whole document comes out of a
+    single render of a compiled template.
+    
+    Args:
+        report_data (list): List of dictionaries containing stock information
+        template_name (str): Name of the HTML template to use
+        
+    Returns:
+        bytes: PDF file content as bytes if successful, None if failed
+    """
+    # ReportLab registers its fonts on import, so workers only pay for it
+    # once they actually render a report
+    from xhtml2pdf import pisa
+
+    try:
+        # Prepare and enrich report data
+        _, context = prepare_report_data(report_data)
+        
+        # Ensure low_stock_items is a list
+        if not isinstance(context.get('low_stock_items'), list):
+            context['low_stock_items'] = []
+
+        context['body_template'] = template_name
+        styled_html = get_template(PDF_SHELL_TEMPLATE).render(context)
+
+        # pisa spools string sources through its own temporary file, so the
+        # HTML isn't copied into another in-memory buffer first
+        result = BytesIO()
+        pdf = pisa.pisaDocument(
+            styled_html,
+            result,
+            encoding='UTF-8',
+            show_error_as_pdf=True
+        )
+
+        if pdf.err:
+            logger.error(f"Error generating PDF: {pdf.err}")
+            return None
+
+        logger.info(
+            f"Successfully generated PDF report with {len(report_data)} items, "
+            f"including {context['low_stock_count']} low stock items"
+        )
+        return result.getvalue()
+
+    except Exception as e:
+        logger.error(f"Failed to generate PDF report: {str(e)}", exc_info=True)
+        return None
@@ -1,6 +1,12 @@
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db.models import F, OuterRef, Subquery
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Product, Inventory
+from django.utils import timezone
+from user_management.models import User, UserRole
+from .models import Product, Category, Inventory
+from .utils import REPORT_RECIPIENTS_CACHE_KEY, CATEGORY_IDS_CACHE_KEY
 
 
 @receiver(post_save, sender=Product)
@@ -12,10 +18,16 @@ def create_inventory_entry(sender, instance, created, **kwargs):
     if created:
         Inventory.objects.create(product=instance, stock_in=instance.stock_quantity)
     else:
-        inventory = Inventory.objects.get(product=instance)
-        inventory.stock_in = instance.stock_quantity
-        inventory.update_stock()
-        inventory.save()
+        # A single UPDATE; the database recomputes current_stock
+        updated = Inventory.objects.filter(product=instance).update(
+            stock_in=instance.stock_quantity,
+            last_updated=timezone.now()
+        )
+        if updated:
+            Product.objects.filter(pk=instance.pk).update(current_stock=Subquery(
+                Inventory.objects.filter(product=OuterRef('pk')).values('current_stock')[:1]
+            ))
+            instance.refresh_from_db(fields=['current_stock'])
 
 
 @receiver(post_delete, sender=Product)
@@ -24,10 +36,45 @@ def delete_inventory_entry(sender, instance, **kwargs):
     Updates inventory stock when a product is deleted.
     Reduces stock in inventory (assumes stock out if deleted).
     """
+    # Assume full stock is removed on deletion
+    Inventory.objects.filter(product=instance).update(
+        stock_out=F('stock_in'), last_updated=timezone.now()
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def invalidate_report_recipients(sender, **kwargs):
+    """
+    Drops the cached stock report recipients when a user or their roles change.
+    """
+    cache.delete(REPORT_RECIPIENTS_CACHE_KEY)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_ids(sender, **kwargs):
+    """
+    Drops the cached category name-to-id map when a category changes.
+    """
+    cache.delete(CATEGORY_IDS_CACHE_KEY)
+
+
+@contextmanager
+def mute(*signals):
+    """
+    Temporarily disconnect every receiver of the given signals, e.g. to
+    create test fixtures without the inventory bookkeeping above.
+    """
+    saved = [(signal, signal.receivers) for signal in signals]
+    for signal in signals:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
     try:
-        inventory = Inventory.objects.get(product=instance)
-        inventory.stock_out = inventory.stock_in  # Assume full stock is removed on deletion
-        inventory.update_stock()
-        inventory.save()
-    except Inventory.DoesNotExist:
-        pass  # In case no inventory exists for the product
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
@@ -1,14 +1,27 @@
-from celery import shared_task
+from base64 import b64decode, b64encode
+from celery import chain, shared_task
 from django.core.mail import EmailMessage, BadHeaderError
-from django.db.models import F
 from django.conf import settings
 from smtplib import SMTPException
-from .models import Product
-from .utils import generate_pdf_report, get_report_recipients
+from .models import LowStockProduct
+from .reports import generate_pdf_report
+from .utils import cached_report_recipients
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+@shared_task
+def refresh_low_stock_products():
+    """
+    Task to rebuild the low stock snapshot read by `send_stock_report`.
+
+    Scheduled a few minutes ahead of each report run.
+    """
+    LowStockProduct.refresh()
+    logger.info("Low stock snapshot refreshed")
+
+
 @shared_task(
     bind=True,
     max_retries=3,
@@ -20,6 +33,11 @@ def send_stock_report(self):
     """
     Task to generate and email a PDF report for products that are at or below
     their minimum stock threshold.
+
+    The low stock rows and the email summary are gathered here; rendering
+    the PDF and sending the email are chained onto their own queues (see
+    `render_low_stock_pdf` and `send_low_stock_email`) so CPU-bound
+    rendering doesn't hold up I/O-bound workers.
     
     Features:
     - Monitors only products with stock levels at or below minimum threshold
@@ -29,32 +47,51 @@ def send_stock_report(self):
     - Detailed error handling
     
     Returns:
-        str: Status message indicating whether report was sent or no low stock found
+        str: Status message indicating whether report was queued or no low stock found
     """
     try:
         
-        recipients = get_report_recipients()
+        recipients = cached_report_recipients()
         if not recipients:
             logger.error("No valid recipients found for stock report")
             return "No valid recipients found for stock report"
         
-        # Fetch only products at or below minimum threshold
-        low_stock_products = Product.objects.filter(
-            stock_quantity__lte=F('min_stock_threshold')
-        ).values(
+        # The snapshot is only as current as its last refresh
+        if LowStockProduct.refresh_if_stale():
+            logger.warning("Low stock snapshot was stale; refreshed it for the report")
+
+        # Read products at or below minimum threshold from the snapshot
+        low_stock_products = LowStockProduct.objects.values_list(
             'name',
-            'stock_quantity',
+            'current_stock',
             'min_stock_threshold',
-            'max_stock_threshold'
-        )
+            'max_stock_threshold',
+            named=True
+        ).iterator(chunk_size=500)
 
-        # Prepare report data
-        report_data = [{
-            'name': product['name'],
-            'current_stock': product['stock_quantity'],
-            'min_threshold': product['min_stock_threshold'],
-            'max_threshold': product['max_stock_threshold']
-        } for product in low_stock_products]
+        # Prepare report data and the email summary in a single pass
+        report_data = []
+        names = []
+        lines = []
+        for product in low_stock_products:
+            report_data.append({
+                'name': product.name,
+                'current_stock': product.current_stock,
+                'min_threshold': product.min_stock_threshold,
+                'max_threshold': product.max_stock_threshold
+            })
+            names.append(product.name)
+            lines.append(
+                f"- {product.name}: {product.current_stock} units "
+                f"(Minimum: {product.min_stock_threshold})"
+            )
+        email_body = (
+            "Low Stock Alert Report\n\n"
+            "The following products are at or below their minimum stock threshold:\n\n"
+            + "\n".join(lines)
+            + "\n\nPlease find attached the detailed report."
+            "Note: This report has been sent to all Admins and Stock  Managers"
+        )
 
         if not report_data:
             logger.info("No products found below minimum stock threshold")
@@ -63,75 +100,98 @@ def send_stock_report(self):
         # Log which products are low on stock
         logger.warning(
             "Low stock detected for products: %s",
-            ", ".join(item['name'] for item in report_data)
+            ", ".join(names)
         )
 
-        # Generate PDF report
-        try:
-            pdf = generate_pdf_report(report_data)
-            if not pdf:
-                raise ValueError("PDF generation returned empty result")
-        except Exception as e:
-            logger.error(f"Failed to generate PDF report: {str(e)}")
-            raise
+        chain(
+            render_low_stock_pdf.s(report_data),
+            send_low_stock_email.s(email_body, len(report_data), recipients)
+        )()
 
-        # Get email settings from Django settings with fallbacks
-        # admin_email = getattr(settings, 'STOCK_ALERT_EMAIL', 'admin@yourstore.com')
-        from_email = getattr(settings, 'COMPANY_EMAIL', 'myinventorywise@gmail.com')
+        logger.info(f"Low stock report queued for {len(report_data)} products")
+        return f"Low stock report queued for {len(report_data)} products!"
 
-        # Create email with summary in body
-        email_body = (
-            "Low Stock Alert Report\n\n"
-            "The following products are at or below their minimum stock threshold:\n\n"
-        )
-        for item in report_data:
-            email_body += (
-                f"- {item['name']}: {item['current_stock']} units "
-                f"(Minimum: {item['min_threshold']})\n"
-            )
-        email_body += (
-            "\nPlease find attached the detailed report."
-            "Note: This report has been sent to all Admins and Stock  Managers"           
-        )
+    except Exception as e:
+        logger.error(f"Failed to process low stock report: {str(e)}")
+        raise
 
-        # Send the email
-        try:
-            email = EmailMessage(
-                subject=f"Low Stock Alert - {len(report_data)} Products Need Attention",
-                body=email_body,
-                from_email=from_email,
-                to=['mrnobletlearns@gmail.com'],
-                bcc=recipients
-            )
-            email.attach('low_stock_report.pdf', pdf, 'application/pdf')
-            email.send(fail_silently=False)
-            
-            logger.info(
-                f"Low stock report sent to {len(recipients)} recipients "
-                f"for {len(report_data)} products"
-            )
-        except BadHeaderError as e:
-            # This exception indicates a misconfiguration, like a bad email header
-            logger.error(f"Failed to send email due to bad header: {str(e)}")
-            raise self.retry(exc=e, countdown=60)  # Retry in 1 minute
-        except SMTPException as e:
-            # Catch general SMTP errors
-            if "Invalid recipient" in str(e):  # Handle invalid email case
-                logger.error(f"Invalid recipient address: {str(e)}")
-                return "Invalid email address, task not retried."
-            else:
-                logger.warning(f"SMTP error occurred, retrying...: {str(e)}")
-                raise self.retry(exc=e)  # Retry the task
-        except Exception as e:
-            # Any other general exception
-            logger.error(f"Unexpected error: {str(e)}")
-            raise self.retry(exc=e)
-
-        logger.info(f"Low stock report sent for {len(report_data)} products")
-        logger.info(f"Low stock report sent successfully to {len(recipients)} recipients.")
-        return f"Low stock report sent for {len(report_data)} products!"
 
+@shared_task
+def render_low_stock_pdf(report_data):
+    """
+    Task to render the low stock PDF report.
+
+    Args:
+        report_data (list): Low stock rows gathered by `send_stock_report`.
+
+    Returns:
+        str: The PDF, base64 encoded so it survives JSON serialization.
+    """
+    try:
+        pdf = generate_pdf_report(report_data)
+        if not pdf:
+            raise ValueError("PDF generation returned empty result")
     except Exception as e:
-        logger.error(f"Failed to process low stock report: {str(e)}")
+        logger.error(f"Failed to generate PDF report: {str(e)}")
         raise
-    
\ No newline at end of file
+    return b64encode(pdf).decode('ascii')
+
+
+@shared_task(
+    bind=True,
+    max_retries=3,
+    default_retry_delay=300,  # 5 minutes
+    retry_backoff=True
+)
+def send_low_stock_email(self, pdf, email_body, product_count, recipients):
+    """
+    Task to email the rendered low stock report.
+
+    Args:
+        pdf (str): The base64 encoded PDF from `render_low_stock_pdf`.
+        email_body (str): The plain text summary of low stock products.
+        product_count (int): The number of products in the report.
+        recipients (list): Email addresses to send the report to.
+
+    Returns:
+        str: Status message indicating whether the report was sent.
+    """
+    # Get email settings from Django settings with fallbacks
+    # admin_email = getattr(settings, 'STOCK_ALERT_EMAIL', 'admin@yourstore.com')
+    from_email = getattr(settings, 'COMPANY_EMAIL', 'myinventorywise@gmail.com')
+
+    # Send the email
+    try:
+        email = EmailMessage(
+            subject=f"Low Stock Alert - {product_count} Products Need Attention",
+            body=email_body,
+            from_email=from_email,
+            to=['mrnobletlearns@gmail.com'],
+            bcc=recipients
+        )
+        email.attach('low_stock_report.pdf', b64decode(pdf), 'application/pdf')
+        email.send(fail_silently=False)
+        
+        logger.info(
+            f"Low stock report sent to {len(recipients)} recipients "
+            f"for {product_count} products"
+        )
+    except BadHeaderError as e:
+        # This exception indicates a misconfiguration, like a bad email header
+        logger.error(f"Failed to send email due to bad header: {str(e)}")
+        raise self.retry(exc=e, countdown=60)  # Retry in 1 minute
+    except SMTPException as e:
+        # Catch general SMTP errors
+        if "Invalid recipient" in str(e):  # Handle invalid email case
+            logger.error(f"Invalid recipient address: {str(e)}")
+            return "Invalid email address, task not retried."
+        else:
+            logger.warning(f"SMTP error occurred, retrying...: {str(e)}")
+            raise self.retry(exc=e)  # Retry the task
+    except Exception as e:
+        # Any other general exception
+        logger.error(f"Unexpected error: {str(e)}")
+        raise self.retry(exc=e)
+
+    logger.info(f"Low stock report sent successfully to {len(recipients)} recipients.")
+    return f"Low stock report sent for {product_count} products!"
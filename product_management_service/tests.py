@@ -1,50 +1,103 @@
-from django.test import TestCase
+from django.contrib.auth.hashers import make_password
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.core.cache import cache
+from django.db import connection
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.urls import reverse
-from .models import Product, Category
-from django.contrib.auth.models import User
-from threading import Thread
+from django.db.models.signals import post_save
+from .models import Product, Category, Inventory, LowStockProduct
+from .signals import mute
+from .reports import generate_pdf_report, prepare_report_data
+from .utils import cached_category_id
+from user_management.models import User, Role, UserRole
+from api.serializers import ProductSerializer
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import copy
 
 # Create your tests here.
 
+# URL patterns are fixed, so list endpoints are resolved once at import
+PRODUCT_LIST_URL = reverse('product-list')
+CATEGORY_LIST_URL = reverse('category-list')
 
-class ProductManagementTests(TestCase):
-    def setUp(self):
-        # Set up API client
-        self.client = APIClient()
 
-        # Create an admin user for testing permissions
-        self.admin_user = User.objects.create_superuser(
-            username="admin", password="adminpass", email="admin@example.com"
-        )
+class ProductManagementTests(TestCase):
+    BASE_PRODUCT = {
+        "name": "Smartphone",
+        "sku": "SM12345",
+        "price": 499.99,
+        "stock_quantity": 5,
+        "category": "Electronics"
+    }
+    product_url = PRODUCT_LIST_URL
+    category_url = CATEGORY_LIST_URL
+
+    @classmethod
+    def setUpTestData(cls):
+        # Create an admin and a regular user in one INSERT, hashing once
+        password = make_password("adminpass")
+        cls.admin_user, cls.regular_user = User.objects.bulk_create([
+            User(username="admin", email="admin@example.com", password=password,
+                 is_staff=True, is_superuser=True),
+            User(username="user", email="user@example.com", password=password),
+        ])
+
+        # Views check role permissions, so give each user a role
+        roles = Role.objects.in_bulk(["admin", "sales_rep"], field_name="name")
+        UserRole.objects.bulk_create([
+            UserRole(user=cls.admin_user, role=roles["admin"]),
+            UserRole(user=cls.regular_user, role=roles["sales_rep"]),
+        ])
 
-        # Create a regular user
-        self.regular_user = User.objects.create_user(
-            username="user", password="userpass", email="user@example.com"
-        )
+        # Create a category
+        cls.category = Category.objects.create(name="Electronics")
+
+        # Create a product, skipping the inventory signals
+        with mute(post_save):
+            cls.product = Product.objects.create(
+                name="Laptop",
+                sku="LAP12345",
+                price=999.99,
+                stock_quantity=10,
+                category=cls.category
+            )
 
-        # Authenticate admin user for product/category management
-        self.client.login(username="admin", password="adminpass")
+        # Detail URLs of the fixtures
+        cls.product_detail_url = reverse('product-detail', kwargs={'pk': cls.product.id})
+        cls.category_detail_url = reverse('category-detail', kwargs={'pk': cls.category.id})
 
-        # Create a category
-        self.category = Category.objects.create(name="Electronics")
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # One API client is shared by every test in the class
+        cls.api_client = APIClient()
 
-        # URL endpoints
-        self.product_url = reverse('product-list')
-        self.category_url = reverse('category-list')
+    def setUp(self):
+        self.client = self.api_client
+        self.client.credentials()
 
-        # Create a product
-        self.product = Product.objects.create(
-            name="Laptop",
-            sku="LAP12345",
-            price=999.99,
-            stock_quantity=10,
-            category=self.category
-        )
+        # Authenticate admin user for product/category management; tests
+        # may switch to the regular user, so this is reset for each test
+        self.client.force_authenticate(user=self.admin_user)
 
     def tearDown(self):
-        self.client.logout()
+        cache.clear()
+
+    def create_products(self, count):
+        """
+        Create `count` products and their inventory in one INSERT each.
+        """
+        return Product.objects.bulk_ingest([
+            Product(
+                name=f"Product {i}",
+                sku=f"SKU-{i}",
+                price=100 + i,
+                stock_quantity=10 + i,
+                category=self.category
+            ) for i in range(count)
+        ])
 
     # Test successful product creation
     def test_create_product(self):
@@ -53,40 +106,115 @@ class ProductManagementTests(TestCase):
             "sku": "SM12345",
             "price": 499.99,
             "stock_quantity": 5,
-            "category": self.category.id
+            "category": self.category.name
         }
         response = self.client.post(self.product_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
-    # Test failure when creating product with negative price
-    def test_create_product_with_negative_price(self):
-        data = {
-            "name": "Smartphone",
-            "sku": "SM12345",
-            "price": -100,
-            "stock_quantity": 5,
-            "category": self.category.id
-        }
+    # Test that invalid product data is rejected on creation
+    def test_create_product_invalid(self):
+        cases = [
+            ("negative price", {"price": -100}, None),
+            ("negative stock", {"stock_quantity": -5}, None),
+            ("empty name", {"name": ""}, None),
+            ("duplicate sku", {"sku": "LAP12345"}, None),  # Same SKU as the existing product
+            ("without category", {"category": None}, None),
+            ("invalid category", {"category": "Unknown"}, None),
+            ("empty sku", {"sku": ""}, 'sku'),
+            ("large input", {"name": "A" * 1000, "sku": "B" * 500}, None),
+            ("max price", {"price": 9999999999.99}, None),  # Max price boundary
+        ]
+        for label, overrides, error_field in cases:
+            with self.subTest(label):
+                data = {**self.BASE_PRODUCT, **overrides}
+                response = self.client.post(self.product_url, data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                if error_field:
+                    self.assertIn(error_field, response.data)
+
+    # Test that a category given as a number, not a name, is a 400
+    def test_create_product_with_non_string_category(self):
+        data = {**self.BASE_PRODUCT, "category": self.category.pk}
         response = self.client.post(self.product_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'],
+                         f"Error: No Category with name {self.category.pk}")
 
-    # Test failure when creating product with negative stock quantity
-    def test_create_product_with_negative_stock(self):
-        data = {
-            "name": "Smartphone",
-            "sku": "SM12345",
-            "price": 499.99,
-            "stock_quantity": -5,
-            "category": self.category.id
-        }
+    # Test failure when creating a product without required fields
+    def test_create_product_without_required_fields(self):
+        data = {k: v for k, v in self.BASE_PRODUCT.items() if k != "name"}
         response = self.client.post(self.product_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
 
-    # Test fetching the list of products
+    # Test fetching the list of products; rows render like serialized instances
     def test_get_product_list(self):
         response = self.client.get(self.product_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'],
+                         [ProductSerializer(self.product).data])
+
+    # Test that a product and its inventory are each read in one query
+    def test_product_detail_and_inventory_query_count(self):
+        self.create_products(1)
+        product = Product.objects.get(sku="SKU-0")
+
+        # Permission check and the row itself
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('product-detail', kwargs={'pk': product.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The user's permissions are cached by now
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('product-inventory', kwargs={'product_id': product.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['current_stock'], 10)
+
+    # Test that patching stock_quantity adds the new stock to the product and its inventory
+    def test_patch_adds_new_stock(self):
+        self.create_products(1)
+        product = Product.objects.get(sku="SKU-0")
+
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+        response = self.client.patch(url, {"stock_quantity": 5}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock_quantity'], 15)
+        self.assertEqual(response.data['current_stock'], 15)
+        inventory = Inventory.objects.get(product=product)
+        self.assertEqual((inventory.stock_in, inventory.current_stock), (15, 15))
+
+    # Test that patches working from stale copies of a product both add their stock
+    def test_patch_stock_from_stale_instances(self):
+        self.create_products(1)
+        product = Product.objects.get(sku="SKU-0")
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+
+        # Both requests see the product as it was before either of them ran,
+        # as two overlapping requests would
+        stale = ProductSerializer.optimized_queryset().get(pk=product.pk)
+        with mock.patch('product_management_service.views.get_object_or_404',
+                        side_effect=lambda *args, **kwargs: copy.copy(stale)):
+            self.client.patch(url, {"stock_quantity": 5}, format='json')
+            response = self.client.patch(url, {"stock_quantity": 7}, format='json')
+        self.assertEqual(response.data['stock_quantity'], 22)
+        product.refresh_from_db()
+        self.assertEqual((product.stock_quantity, product.current_stock), (22, 22))
+        inventory = Inventory.objects.get(product=product)
+        self.assertEqual((inventory.stock_in, inventory.current_stock), (22, 22))
+
+    # Test that an unchanged product is answered with 304 until its stock changes
+    def test_product_detail_conditional_get(self):
+        self.create_products(1)
+        product = Product.objects.get(sku="SKU-0")
+        url = reverse('product-detail', kwargs={'pk': product.pk})
+
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Inventory.objects.get(product=product).add_stock(5)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['current_stock'], 15)
 
     # Test searching by product name
     def test_search_product(self):
@@ -94,6 +222,13 @@ class ProductManagementTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    # Test that search only returns products whose name or SKU matches
+    def test_search_product_by_sku(self):
+        self.create_products(3)
+        response = self.client.get(self.product_url + '?search=SKU-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['sku'] for p in response.data['results']], ['SKU-1'])
+
     # Test filtering by price
     def test_filter_product_by_price(self):
         response = self.client.get(self.product_url + '?price=999.99')
@@ -107,20 +242,74 @@ class ProductManagementTests(TestCase):
             "sku": "LAP12345",
             "price": 1099.99,
             "stock_quantity": 15,
-            "category": self.category.id
+            "category": self.category.name
         }
-        url = reverse('product-detail', kwargs={'pk': self.product.id})
+        url = self.product_detail_url
         response = self.client.put(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['name'], 'Updated Laptop')
 
     # Test deleting product
     def test_delete_product(self):
-        url = reverse('product-detail', kwargs={'pk': self.product.id})
+        url = self.product_detail_url
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Product.objects.filter(id=self.product.id).exists())
 
+    # Test that category names are resolved from the cache until categories change
+    def test_category_lookup_is_cached(self):
+        self.assertEqual(cached_category_id("Electronics"), self.category.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_category_id("Electronics"), self.category.id)
+
+        self.category.name = "Gadgets"
+        self.category.save()
+        self.assertIsNone(cached_category_id("Electronics"))
+        self.assertEqual(cached_category_id("Gadgets"), self.category.id)
+
+    # Test that listing categories doesn't load their parents
+    def test_category_list_query_count(self):
+        for i in range(3):
+            Category.objects.create(name=f"Subcategory {i}", parent_category=self.category)
+
+        # Permission check, page count and the page itself
+        with self.assertNumQueries(3):
+            response = self.client.get(self.category_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 4)
+
+    # Test that deleting all categories also removes their products and inventory
+    def test_delete_all_categories(self):
+        self.create_products(2)
+        self.assertEqual(cached_category_id("Electronics"), self.category.id)
+        response = self.client.delete(self.category_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Category.objects.exists())
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(Inventory.objects.exists())
+        self.assertIsNone(cached_category_id("Electronics"))
+
+    # Test that regular users are denied deleting all categories
+    def test_regular_user_cannot_delete_all_categories(self):
+        self.client.force_authenticate(user=self.regular_user)
+        response = self.client.delete(self.category_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['message'],
+                         "You do not have permission to delete categories.")
+        self.assertTrue(Category.objects.exists())
+
+    # Test that category names are matched and kept unique ignoring case
+    def test_category_names_ignore_case(self):
+        self.assertEqual(cached_category_id("ELECTRONICS"), self.category.id)
+        data = {**self.BASE_PRODUCT, "category": "electronics"}
+        response = self.client.post(self.product_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['category'], self.category.id)
+
+        response = self.client.post(self.category_url, {"name": "electronics"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
+
     # Test creating a new category
     def test_create_category(self):
         data = {"name": "Books"}
@@ -135,30 +324,28 @@ class ProductManagementTests(TestCase):
 
     # Test that regular users cannot manage products
     def test_regular_user_cannot_manage_products(self):
-        self.client.logout()
-        self.client.login(username="user", password="userpass")
+        self.client.force_authenticate(user=self.regular_user)
 
         data = {
             "name": "Tablet",
             "sku": "TAB12345",
             "price": 299.99,
             "stock_quantity": 20,
-            "category": self.category.id
+            "category": self.category.name
         }
         response = self.client.post(self.product_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
-    # Test failure when creating product with an empty name
-    def test_create_product_with_empty_name(self):
-        data = {
-            "name": "",
-            "sku": "SM12345",
-            "price": 499.99,
-            "stock_quantity": 5,
-            "category": self.category.id
-        }
-        response = self.client.post(self.product_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    # Test that list endpoints deny access with the same body as detail views
+    def test_list_permission_denied_body(self):
+        norole = User.objects.create(username="norole", email="norole@example.com")
+        self.client.force_authenticate(user=norole)
+        response = self.client.get(self.product_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.json(), {
+            "message": "You do not have permission to view product list.",
+            "status_code": status.HTTP_403_FORBIDDEN
+        })
 
     # Test updating a product with invalid data (negative price)
     def test_update_product_with_invalid_data(self):
@@ -167,84 +354,16 @@ class ProductManagementTests(TestCase):
             "sku": "LAP54321",
             "price": -999.99,  # Negative price should be invalid
             "stock_quantity": 10,
-            "category": self.category.id
+            "category": self.category.name
         }
-        url = reverse('product-detail', kwargs={'pk': self.product.id})
+        url = self.product_detail_url
         response = self.client.put(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-    # Test failure when creating product with duplicate SKU
-    def test_create_product_with_duplicate_sku(self):
-        data = {
-            "name": "Tablet",
-            "sku": "LAP12345",  # Same SKU as the existing product
-            "price": 399.99,
-            "stock_quantity": 20,
-            "category": self.category.id
-        }
-        response = self.client.post(self.product_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-
-    # Test failure when creating product without a category
-    def test_create_product_without_category(self):
-        data = {
-            "name": "Smartwatch",
-            "sku": "SW12345",
-            "price": 199.99,
-            "stock_quantity": 8,
-            "category": None  # No category assigned
-        }
-        response = self.client.post(self.product_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-
-    # Test failure when creating product with non-existent category
-    def test_create_product_with_invalid_category(self):
-        data = {
-            "name": "Smartwatch",
-            "sku": "SW12345",
-            "price": 199.99,
-            "stock_quantity": 8,
-            "category": 9999  # Non-existent category
-        }
-        response = self.client.post(self.product_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-
-    # Test failure when creating a product without required fields
-    def test_create_product_without_required_fields(self):
-        data = {
-            "sku": "SM12345",
-            "price": 499.99,
-            "stock_quantity": 5,
-            "category": self.category.id
-        }
-        response = self.client.post(self.product_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn('name', response.data)
-
-    # Test failure when creating a product with invalid SKU format
-    def test_create_product_with_invalid_sku(self):
-        data = {
-            "name": "Smartphone",
-            "sku": "",  # Empty SKU or invalid format
-            "price": 499.99,
-            "stock_quantity": 5,
-            "category": self.category.id
-        }
-        response = self.client.post(self.product_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn('sku', response.data)
-
     # Test product pagination
     def test_product_pagination(self):
         # Create more products to test pagination
-        for i in range(15):
-            Product.objects.create(
-                name=f"Product {i}",
-                sku=f"SKU-{i}",
-                price=100 + i,
-                stock_quantity=10 + i,
-                category=self.category
-            )
+        self.create_products(15)
 
         response = self.client.get(self.product_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -253,6 +372,23 @@ class ProductManagementTests(TestCase):
         self.assertLessEqual(len(response.data['results']), 10)
         self.assertIn('next', response.data)  # Verify next page exists
 
+        # The cursor continues where the first page stopped, newest first
+        next_page = self.client.get(response.data['next'])
+        self.assertEqual(len(next_page.data['results']), 6)
+        self.assertIsNone(next_page.data['next'])
+        ids = [p['id'] for p in response.data['results'] + next_page.data['results']]
+        self.assertEqual(ids, sorted(Product.objects.values_list('id', flat=True), reverse=True))
+
+    # Test that listing products doesn't run a query per product
+    def test_product_list_no_n_plus_one(self):
+        self.create_products(10)
+
+        # Permission check and the page itself; cursor pages aren't counted
+        with self.assertNumQueries(2):
+            response = self.client.get(self.product_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+
     # Test filtering products by category
     def test_filter_product_by_category(self):
         response = self.client.get(self.product_url + f'?category={self.category.id}')
@@ -261,111 +397,53 @@ class ProductManagementTests(TestCase):
 
     # Test updating product without changing SKU
     def test_update_product_without_changing_sku(self):
-        data = {
-            "name": "Laptop",
-            "sku": self.product.sku,  # Same SKU
-            "price": 1099.99,
-            "stock_quantity": 8,
-            "category": self.category.id
-        }
-        url = reverse('product-detail', kwargs={'pk': self.product.id})
-        response = self.client.put(url, data, format='json')
+        data = {"price": 1099.99}  # SKU is left out of the update
+        url = self.product_detail_url
+        response = self.client.patch(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['sku'], self.product.sku)  # Verify SKU remains the same
 
     # Test that regular users cannot delete products
     def test_regular_user_cannot_delete_product(self):
-        self.client.logout()
-        self.client.login(username="user", password="userpass")
+        self.client.force_authenticate(user=self.regular_user)
 
-        url = reverse('product-detail', kwargs={'pk': self.product.id})
+        url = self.product_detail_url
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
-    # Test deleting a category
+    # Test deleting a category, which also removes its products
     def test_delete_category(self):
-        url = reverse('category-detail', kwargs={'pk': self.category.id})
+        url = self.category_detail_url
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Category.objects.filter(id=self.category.id).exists())
+        self.assertFalse(Product.objects.filter(id=self.product.id).exists())
 
-    def test_simultaneous_product_updates(self):
-    # Create a new product to test on
-        product = Product.objects.create(
-            name="Tablet", sku="TAB12345", price=300, stock_quantity=20, category=self.category
-        )
-        url = reverse('product-detail', kwargs={'pk': product.id})
-
-    # First update thread
-    def update_product_1():
-            data = {"name": "Tablet - Updated 1", "sku": product.sku, "price": 400, "stock_quantity": 10, "category": self.category.id}
-            self.client.put(url, data, format='json')
-
-    # Second update thread
-    def update_product_2():
-            data = {"name": "Tablet - Updated 2", "sku": product.sku, "price": 500, "stock_quantity": 5, "category": self.category.id}
-            self.client.put(url, data, format='json')
-
-    # Run both updates simultaneously
-            thread1 = Thread(target=update_product_1)
-            thread2 = Thread(target=update_product_2)
-            thread1.start()
-            thread2.start()
-            thread1.join()
-            thread2.join()
-
-    # Fetch the product to check the final state
-            response = self.client.get(url)
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertIn(response.data['name'], ['Tablet - Updated 1', 'Tablet - Updated 2'])
-
-    def test_create_product_with_large_input(self):
-        large_name = "A" * 1000  # Exceeds normal length
-        large_sku = "B" * 500
-
-        data = {
-            "name": large_name,
-            "sku": large_sku,
-            "price": 499.99,
-            "stock_quantity": 5,
-            "category": self.category.id
-        }
-        response = self.client.post(self.product_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-
+    # Test creating a product with a price of zero
     def test_create_product_with_zero_price(self):
         data = {
             "name": "Free Product",
             "sku": "FP12345",
             "price": 0,
             "stock_quantity": 10,
-            "category": self.category.id
+            "category": self.category.name
         }
         response = self.client.post(self.product_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    # Test creating a product with no stock
     def test_create_product_with_zero_stock(self):
         data = {
             "name": "Out of Stock Product",
             "sku": "OOS12345",
             "price": 100,
             "stock_quantity": 0,
-            "category": self.category.id
+            "category": self.category.name
         }
         response = self.client.post(self.product_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
-    def test_create_product_with_max_price(self):
-        data = {
-            "name": "Luxury Product",
-            "sku": "LX12345",
-            "price": 9999999999.99,  # Max price boundary
-            "stock_quantity": 5,
-            "category": self.category.id
-        }
-        response = self.client.post(self.product_url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-
+    # Test pagination when there are no products
     def test_product_pagination_empty_list(self):
         Product.objects.all().delete()  # Ensure no products exist
         response = self.client.get(self.product_url)
@@ -374,33 +452,37 @@ class ProductManagementTests(TestCase):
         self.assertIn('next', response.data)
         self.assertIsNone(response.data['next'])  # No next page if empty
 
+    # Test searching with a lowercase term
     def test_search_product_case_insensitive(self):
         response = self.client.get(self.product_url + '?search=laptop')  # All lowercase
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    # Test searching with a mixed case term
     def test_search_product_case_sensitive(self):
         response = self.client.get(self.product_url + '?search=LapTop')  # Mixed case
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    # Test filtering by a category other than the fixture's
     def test_filter_products_across_multiple_categories(self):
-    # Create another category
+        # Create another category
         new_category = Category.objects.create(name="Furniture")
 
-    # Create product in the new category
+        # Create product in the new category
         Product.objects.create(
             name="Chair", sku="CHAIR123", price=50, stock_quantity=15, category=new_category
         )
 
-    # Filter by category (Furniture)
+        # Filter by category (Furniture)
         response = self.client.get(self.product_url + f'?category={new_category.id}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['name'], "Chair")
 
+    # Test partially updating a product
     def test_partial_update_product(self):
-        url = reverse('product-detail', kwargs={'pk': self.product.id})
+        url = self.product_detail_url
 
         data = {"price": 799.99}  # Only updating price
         response = self.client.patch(url, data, format='json')
@@ -409,7 +491,101 @@ class ProductManagementTests(TestCase):
         self.assertEqual(float(response.data['price']), 799.99) # Cast the response to float since a string was returned
         self.assertEqual(response.data['name'], "Laptop")  # Name remains unchanged
 
+    # Test that a stale low stock snapshot is rebuilt, and a fresh one kept
+    def test_low_stock_snapshot_refreshed_when_stale(self):
+        Product.objects.filter(pk=self.product.pk).update(current_stock=0, min_stock_threshold=5)
+        self.assertTrue(LowStockProduct.refresh_if_stale())
+        self.assertEqual(list(LowStockProduct.objects.values_list('name', flat=True)), ["Laptop"])
+
+        Product.objects.filter(pk=self.product.pk).update(current_stock=10)
+        self.assertFalse(LowStockProduct.refresh_if_stale())
+        self.assertTrue(LowStockProduct.objects.exists())
+
+    # Test that script injection in the query string is not echoed back
     def test_invalid_url_injection(self):
         response = self.client.get(self.product_url + "?search=<script>alert('XSS')</script>")
         self.assertEqual(response.status_code, status.HTTP_200_OK)  # No crash
-        self.assertNotIn('<script>', str(response.data))  # Ensure no malicious content is returned
\ No newline at end of file
+        self.assertNotIn('<script>', str(response.data))  # Ensure no malicious content is returned
+
+
+# Threads need their own committed view of the data, which TestCase's
+# wrapping transaction would hide from them. SQLite's in-memory test
+# database is shared by one connection, so these only run on other backends.
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ProductConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_user(
+            username="admin", password="adminpass", email="admin@example.com"
+        )
+        # The flush between TransactionTestCases drops the seeded roles
+        role, _ = Role.objects.get_or_create(name="admin")
+        role.add_permission("edit_item")
+        UserRole.objects.create(user=self.admin_user, role=role)
+        self.category = Category.objects.create(name="Electronics")
+        self.product = Product.objects.create(
+            name="Tablet", sku="TAB12345", price=300, stock_quantity=20, category=self.category
+        )
+        self.url = reverse('product-detail', kwargs={'pk': self.product.id})
+
+    def update_product(self, name, price):
+        client = APIClient()
+        client.force_authenticate(user=self.admin_user)
+        data = {"name": name, "sku": self.product.sku, "price": price, "stock_quantity": 10, "category": self.category.name}
+        try:
+            return client.put(self.url, data, format='json').status_code
+        finally:
+            connection.close()  # Each worker thread opens its own connection
+
+    # Test that two simultaneous updates both succeed and one of them wins
+    def test_simultaneous_product_updates(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(
+                self.update_product,
+                ["Tablet - Updated 1", "Tablet - Updated 2"],
+                [400, 500]
+            ))
+        self.assertEqual(results, [status.HTTP_200_OK, status.HTTP_200_OK])
+
+        self.product.refresh_from_db()
+        self.assertIn(self.product.name, ["Tablet - Updated 1", "Tablet - Updated 2"])
+
+
+class StockReportTests(SimpleTestCase):
+    REPORT_DATA = [
+        {"name": "Laptop", "sku": "LAP12345", "current_stock": 0, "min_threshold": 10, "max_threshold": 100},
+        {"name": "Tablet", "sku": "TAB12345", "current_stock": 4, "min_threshold": 10, "max_threshold": 100},
+        {"name": "Phone", "sku": "PHO12345", "current_stock": 40, "min_threshold": 10, "max_threshold": 100},
+    ]
+
+    # Test that the stock report renders to a PDF document
+    def test_generate_pdf_report(self):
+        pdf = generate_pdf_report([dict(item) for item in self.REPORT_DATA])
+        self.assertIsNotNone(pdf)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+
+    # Test that report items are enriched, sorted low stock first, and totalled
+    def test_prepare_report_data(self):
+        sorted_data, context = prepare_report_data([dict(item) for item in self.REPORT_DATA])
+        self.assertEqual([item['name'] for item in sorted_data], ["Tablet", "Laptop", "Phone"])
+        self.assertEqual([item['name'] for item in context['low_stock_items']], ["Tablet", "Laptop"])
+        self.assertEqual([item['name'] for item in context['critical_items']], ["Laptop"])
+        self.assertAlmostEqual(context['report_summary']['avg_stock_level'], 440 / 3)
+        self.assertEqual(context['report_summary']['items_below_50_pct'], 2)
+
+        with self.assertRaises(ValueError):
+            prepare_report_data([{"name": "Laptop"}])
+
+    # Test that each report item carries the status shown in the PDF
+    def test_prepare_report_data_statuses(self):
+        sorted_data, _ = prepare_report_data([dict(item) for item in self.REPORT_DATA])
+        self.assertEqual(
+            {item['name']: item['status_label'] for item in sorted_data},
+            {"Laptop": "Out of Stock", "Tablet": "Low Stock", "Phone": "Normal"}
+        )
+
+    # Test that a report without low stock items is ordered by name alone
+    def test_prepare_report_data_without_low_stock(self):
+        healthy = [dict(item, current_stock=50) for item in self.REPORT_DATA]
+        sorted_data, context = prepare_report_data(healthy)
+        self.assertEqual([item['name'] for item in sorted_data], ["Tablet", "Phone", "Laptop"])
+        self.assertEqual(context['report_type'], 'Stock Report')
@@ -1,33 +1,60 @@
-from rest_framework import status, filters
+from rest_framework import generics, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from .models import Product, Category, Inventory
 from api.serializers import ProductSerializer, CategorySerializer, InventorySerializer
 from api.utils import JWTAuthentication
 from user_management.permissions import has_permission
-from .utils import generate_sku
+from .filters import ProductFilter
+from .permissions import HasRolePermission
+from .utils import generate_sku, cached_category_id, CATEGORY_IDS_CACHE_KEY
 
 
-class ProductPagination(PageNumberPagination):
+class ProductPagination(CursorPagination):
     """
-    Custom pagination class for product listings.
+    Cursor pagination class for product listings.
+
+    Pages are fetched with `WHERE id < <last seen id>` on the primary key
+    instead of an OFFSET, so deep pages cost the same as the first one.
 
     Attributes:
         page_size (int): Default number of items per page.
         page_size_query_param (str): Parameter name to allow clients to
         set the page size.
         max_page_size (int): Maximum number of items per page.
+        ordering (str): Newest products first; unique, as cursors require.
     """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    ordering = '-id'
 
 
-class ProductList(APIView):
+class CategoryPagination(PageNumberPagination):
+    """
+    Custom pagination class for category listings.
+
+    Attributes:
+        page_size (int): Default number of items per page.
+        page_size_query_param (str): Parameter name to allow clients to
+        set the page size.
+        max_page_size (int): Maximum number of items per page.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ProductList(generics.ListCreateAPIView):
     """
     Handles GET and POST requests for Product objects.
 
@@ -40,8 +67,21 @@ class ProductList(APIView):
         product list.
     """
     authentication_classes = [JWTAuthentication]
-
-    def get(self, request):
+    permission_classes = [HasRolePermission]
+    required_permissions = {
+        'GET': ('view_item', "You do not have permission to view product list."),
+        'POST': ('edit_item', "You do not have permission to add a product."),
+    }
+    serializer_class = ProductSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_class = ProductFilter
+    search_fields = ['name', 'sku']
+    pagination_class = ProductPagination
+
+    def get_queryset(self):
+        return ProductSerializer.optimized_queryset()
+
+    def get(self, request, *args, **kwargs):
         """
         Retrieves a list of products, applying filters, search, and pagination.
 
@@ -51,27 +91,15 @@ class ProductList(APIView):
         Returns:
             Response: A paginated list of serialized product data.
         """
-        if not has_permission(request.user, 'view_item'):
-            return Response({
-                "message": "You do not have permission to view product list.",
-                "status_code": status.HTTP_403_FORBIDDEN
-            }, status=status.HTTP_403_FORBIDDEN)
-         
-        queryset = Product.objects.all()
-
-        # Apply filters and search
-        filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-        for backend in filter_backends:
-            queryset = backend().filter_queryset(request, queryset, self)
-
-        # Apply pagination
-        paginator = ProductPagination()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
-        serializer = ProductSerializer(paginated_queryset, many=True)
+        return self.list(request, *args, **kwargs)
 
-        return paginator.get_paginated_response(serializer.data)
+    def list(self, request, *args, **kwargs):
+        # Page through plain rows rather than Product instances
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values(*ProductSerializer.Meta.fields))
+        return self.get_paginated_response(ProductSerializer.serialize_rows(page))
     
-    def post(self, request):
+    def post(self, request, *args, **kwargs):
         """
         Creates a new product with automatic SKU generation.
 
@@ -82,19 +110,14 @@ class ProductList(APIView):
             Response: Serialized new product data or validation errors with
             status 400.
         """
-        if not has_permission(request.user, 'edit_item'):
-            return Response({
-                "message": "You do not have permission to add a product.",
-                "status_code": status.HTTP_403_FORBIDDEN
-            }, status=status.HTTP_403_FORBIDDEN)
         data = request.data
         
         category_name = data.get('category')
         if category_name:
-            try:
-                category = Category.objects.get(name=category_name)
-                data['category'] = category.id
-            except Category.DoesNotExist:
+            category_id = cached_category_id(category_name)
+            if category_id is not None:
+                data['category'] = category_id
+            else:
                 return Response({
                     "message": f"Error: No Category with name {category_name}",
                     "status_code": status.HTTP_400_BAD_REQUEST
@@ -105,26 +128,25 @@ class ProductList(APIView):
                 "status_code": status.HTTP_400_BAD_REQUEST
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = ProductSerializer(data=data)
+        serializer = self.get_serializer(data=data)
         if serializer.is_valid():
-            product_data = serializer.validated_data
-            name = product_data.get('name')
-            category = product_data.get('category')
-            sku = generate_sku(name, category)
-
-            product = Product.objects.create(
-                sku=sku,
-                name=name,
-                description=product_data.get('description', ''),
-                price=product_data.get('price'),
-                stock_quantity=product_data.get('stock_quantity'),
-                category=category,
-                barcode=product_data.get('barcode', '')
-            )
-            return Response(ProductSerializer(product).data, status=status.HTTP_201_CREATED)
+            self.perform_create(serializer)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def perform_create(self, serializer):
+        """
+        Saves a new product under a SKU generated from its name and category.
+
+        The inventory entry is created by the product's post_save signal,
+        so both INSERTs commit together or not at all.
+        """
+        product_data = serializer.validated_data
+        sku = generate_sku(product_data['name'], product_data['category'].name)
+        with transaction.atomic():
+            serializer.save(sku=sku)
+
 
 class ProductDetail(APIView):
     """
@@ -156,9 +178,17 @@ class ProductDetail(APIView):
                 "status_code": status.HTTP_403_FORBIDDEN
             }, status=status.HTTP_403_FORBIDDEN)
             
-        product = get_object_or_404(Product, pk=pk)
+        product = get_object_or_404(ProductSerializer.optimized_queryset(), pk=pk)
+        # Stock changes are applied with UPDATEs that don't touch updated_at
+        etag = quote_etag(f'{product.updated_at.timestamp()}-{product.current_stock}')
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
         serializer = ProductSerializer(product)
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        response['ETag'] = etag
+        return response
 
     def put(self, request, pk):
         """
@@ -181,10 +211,10 @@ class ProductDetail(APIView):
         data = request.data
         category_name = data.get('category')
         if category_name:
-            try:
-                category = Category.objects.get(name=category_name)
-                data['category'] = category.id
-            except Category.DoesNotExist:
+            category_id = cached_category_id(category_name)
+            if category_id is not None:
+                data['category'] = category_id
+            else:
                 return Response({
                     "message": f"Error: No Category with name {category_name}",
                     "status_code": status.HTTP_400_BAD_REQUEST
@@ -195,7 +225,7 @@ class ProductDetail(APIView):
                 "status_code": status.HTTP_400_BAD_REQUEST
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        product = get_object_or_404(Product, pk=pk)
+        product = get_object_or_404(ProductSerializer.optimized_queryset(), pk=pk)
         serializer = ProductSerializer(product, data=data)
         if serializer.is_valid():
             serializer.save()
@@ -240,29 +270,35 @@ class ProductDetail(APIView):
                 "status_code": status.HTTP_403_FORBIDDEN
             }, status=status.HTTP_403_FORBIDDEN)
         
-        product = get_object_or_404(Product, pk=pk)
+        product = get_object_or_404(ProductSerializer.optimized_queryset(), pk=pk)
         serializer = ProductSerializer(product, data=request.data, partial=True)  # Allow partial updates
 
         if serializer.is_valid():
-            new_stock = request.data.get('stock_quantity', None)
+            new_stock = serializer.validated_data.get('stock_quantity')
             if new_stock is not None:
-                old_stock_quantity = product.stock_quantity
-                product.stock_quantity = old_stock_quantity + new_stock
-                product.save()
-
-                inventory = Inventory.objects.get(product=product)
-                inventory.stock_in += new_stock
-                inventory.update_stock()
-                inventory.save()
-
-            else:
-                product = serializer.save()  # For non-stock updates
-
+                # Add the new stock in the database so concurrent patches
+                # can't overwrite each other
+                with transaction.atomic():
+                    Product.objects.filter(pk=pk).update(
+                        stock_quantity=F('stock_quantity') + new_stock,
+                        current_stock=F('current_stock') + new_stock,
+                        updated_at=timezone.now()
+                    )
+                    Inventory.objects.filter(product_id=pk).update(
+                        stock_in=F('stock_in') + new_stock,
+                        last_updated=timezone.now()
+                    )
+                # Read the new stock back from the primary, not a lagging replica
+                product.refresh_from_db(using='default',
+                                        fields=['stock_quantity', 'current_stock', 'updated_at'])
+                return Response(ProductSerializer(product).data, status=status.HTTP_200_OK)
+
+            serializer.save()  # For non-stock updates
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CategoryList(APIView):
+class CategoryList(generics.ListCreateAPIView):
     """
     Handles GET and POST requests for Category objects.
 
@@ -275,8 +311,21 @@ class CategoryList(APIView):
         category list.
     """
     authentication_classes = [JWTAuthentication]
-
-    def get(self, request):
+    permission_classes = [HasRolePermission]
+    required_permissions = {
+        'GET': ('view_item', "You do not have permission to view categories."),
+        'POST': ('edit_item', "You do not have permission to create categories."),
+        'DELETE': ('delete_item', "You do not have permission to delete categories."),
+    }
+    serializer_class = CategorySerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    search_fields = ['name']
+    pagination_class = CategoryPagination
+
+    def get_queryset(self):
+        return CategorySerializer.optimized_queryset()
+
+    def get(self, request, *args, **kwargs):
         """
         Retrieves a list of categories, applying filters, search,
         and pagination.
@@ -287,26 +336,9 @@ class CategoryList(APIView):
         Returns:
             Response: A paginated list of serialized category data.
         """
-        if not has_permission(request.user, 'view_item'):
-            return Response({
-                "message": "You do not have permission to view categories.",
-                "status_code": status.HTTP_403_FORBIDDEN
-            }, status=status.HTTP_403_FORBIDDEN)
-        queryset = Category.objects.all()
-
-        # Apply filters and search
-        filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-        for backend in filter_backends:
-            queryset = backend().filter_queryset(request, queryset, self)
-
-        # Apply pagination
-        paginator = ProductPagination()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
-        serializer = CategorySerializer(paginated_queryset, many=True)
-
-        return paginator.get_paginated_response(serializer.data)
+        return self.list(request, *args, **kwargs)
 
-    def post(self, request):
+    def post(self, request, *args, **kwargs):
         """
         Creates a new category based on the provided data.
 
@@ -317,15 +349,9 @@ class CategoryList(APIView):
             Response: Serialized category data with status 201 if successful,
             or validation errors with status 400.
         """
-        if not has_permission(request.user, 'edit_item'):
-            return Response({
-                "message": "You do not have permission to create categories.",
-                "status_code": status.HTTP_403_FORBIDDEN
-            }, status=status.HTTP_403_FORBIDDEN)
-            
-        serializer = CategorySerializer(data=request.data)
+        serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            self.perform_create(serializer)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -339,13 +365,9 @@ class CategoryList(APIView):
         Returns:
             Response: A message indicating successful deletion with status 204.
         """
-        if not has_permission(request.user, 'delete_item'):
-            return Response({
-                "message": "You do not have permission to delete categories.",
-                "status_code": status.HTTP_403_FORBIDDEN
-            }, status=status.HTTP_403_FORBIDDEN)
-        
-        Category.objects.all().delete()
+        Category.delete_all()
+        # TRUNCATE sends no delete signals, so drop the cached lookups here
+        cache.delete(CATEGORY_IDS_CACHE_KEY)
         return Response({
             "message": "All categories have been deleted.",
             "status_code": status.HTTP_200_OK
@@ -382,9 +404,18 @@ class CategoryDetail(APIView):
                 "status_code": status.HTTP_403_FORBIDDEN
             }, status=status.HTTP_403_FORBIDDEN)
             
-        category = get_object_or_404(Category, pk=pk)
+        category = get_object_or_404(CategorySerializer.optimized_queryset(), pk=pk)
+        etag = quote_etag(str(category.updated_at.timestamp()))
+        last_modified = int(category.updated_at.timestamp())
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
         serializer = CategorySerializer(category)
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
 
     def put(self, request, pk):
         """
@@ -404,7 +435,8 @@ class CategoryDetail(APIView):
                 "status_code": status.HTTP_403_FORBIDDEN
             }, status=status.HTTP_403_FORBIDDEN)
             
-        category = get_object_or_404(Category, pk=pk)
+        # Saving reads the parent's path, so load the parent in the same query
+        category = get_object_or_404(Category.objects.select_related('parent_category'), pk=pk)
         serializer = CategorySerializer(category, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -442,11 +474,11 @@ class ProductInventoryView(APIView):
                 "message": "You do not have permission to view product inventory.",
                 "status_code": status.HTTP_403_FORBIDDEN
             }, status=status.HTTP_403_FORBIDDEN)
-        product = get_object_or_404(Product, id=product_id)
-        
         try:
-            inventory = Inventory.objects.get(product=product)
+            inventory = InventorySerializer.optimized_queryset().get(product_id=product_id)
         except Inventory.DoesNotExist:
+            # Only the fields used to report a missing inventory are needed
+            product = get_object_or_404(Product.objects.only('id', 'name', 'sku'), id=product_id)
             return Response({
                 'message': f"No inventory found for {product}",
                 'status_code': status.HTTP_404_NOT_FOUND
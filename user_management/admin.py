@@ -16,9 +16,20 @@ from django.contrib import admin
 from .models import User, Role, Permission, UserRole, RolePermission
 
 
+class UserRoleAdmin(admin.ModelAdmin):
+    # Rows show both sides of the link, so join them into the changelist query
+    list_display = ('user', 'role')
+    list_select_related = ('user', 'role')
+
+
+class RolePermissionAdmin(admin.ModelAdmin):
+    list_display = ('role', 'permission')
+    list_select_related = ('role', 'permission')
+
+
 # Register your models here.
 admin.site.register(User)
 admin.site.register(Role)
 admin.site.register(Permission)
-admin.site.register(UserRole)
-admin.site.register(RolePermission)
\ No newline at end of file
+admin.site.register(UserRole, UserRoleAdmin)
+admin.site.register(RolePermission, RolePermissionAdmin)
\ No newline at end of file
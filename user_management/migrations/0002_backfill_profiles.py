@@ -0,0 +1,33 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def create_missing_profiles(apps, schema_editor):
+    # Users created without save(), e.g. by bulk_create, never got the
+    # profile the post_save signal creates
+    User = apps.get_model('user_management', 'User')
+    Profile = apps.get_model('user_management', 'Profile')
+    db = schema_editor.connection.alias
+
+    missing = User.objects.using(db).filter(profile__isnull=True).values_list(
+        'id', flat=True).iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    for user_id in missing:
+        batch.append(Profile(user_id=user_id))
+        if len(batch) == BATCH_SIZE:
+            Profile.objects.using(db).bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        Profile.objects.using(db).bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', 'roles_and_perm'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
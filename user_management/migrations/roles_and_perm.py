@@ -24,33 +24,36 @@ def create_roles_and_permissions(apps, schema_editor):
         ('delete_item', 'Can delete items'),
     ]
 
-    # Use transaction to ensure atomicity
-    with transaction.atomic():
-        for role_name, description in roles:
-            Role.objects.get_or_create(name=role_name, description=description)
-
-        for permission_name, description in permissions:
-            Permission.objects.get_or_create(name=permission_name, description=description)
-
-        role_permissions = {
-            'admin': ['create_user', 'update_user', 'delete_user', 'view_item', 'edit_item', 'delete_item'],
-            'stock_manager': ['view_item', 'edit_item'],
-            'sales_rep': ['view_item'],
-        }
-
-        for role_name, perm_names in role_permissions.items():
-            try:
-                role = Role.objects.get(name=role_name)
-            except Role.DoesNotExist:
-                raise ValueError(f"Role '{role_name}' does not exist.")
-
-            for perm_name in perm_names:
-                try:
-                    permission = Permission.objects.get(name=perm_name)
-                except Permission.DoesNotExist:
-                    raise ValueError(f"Permission '{perm_name}' does not exist.")
-
-                RolePermission.objects.get_or_create(role=role, permission=permission)
+    role_permissions = {
+        'admin': ['create_user', 'update_user', 'delete_user', 'view_item', 'edit_item', 'delete_item'],
+        'stock_manager': ['view_item', 'edit_item'],
+        'sales_rep': ['view_item'],
+    }
+
+    db = schema_editor.connection.alias
+
+    # Use transaction to ensure atomicity; each model is seeded with one
+    # INSERT, skipping rows that already exist
+    with transaction.atomic(using=db):
+        Role.objects.using(db).bulk_create(
+            [Role(name=name, description=description) for name, description in roles],
+            ignore_conflicts=True
+        )
+        Permission.objects.using(db).bulk_create(
+            [Permission(name=name, description=description) for name, description in permissions],
+            ignore_conflicts=True
+        )
+
+        role_ids = dict(Role.objects.using(db).filter(
+            name__in=role_permissions).values_list('name', 'id'))
+        permission_ids = dict(Permission.objects.using(db).filter(
+            name__in=[name for name, _ in permissions]).values_list('name', 'id'))
+
+        RolePermission.objects.using(db).bulk_create([
+            RolePermission(role_id=role_ids[role_name], permission_id=permission_ids[perm_name])
+            for role_name, perm_names in role_permissions.items()
+            for perm_name in perm_names
+        ], ignore_conflicts=True)
 
 
 class Migration(migrations.Migration):
@@ -7,11 +7,14 @@ It uses Django's built-in authentication system and extends it with
 additional features such as role-based permissions.
 """
 
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin)
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils import timezone
 from django.core.validators import EmailValidator
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
@@ -33,6 +36,9 @@ class CustomUserManager(BaseUserManager):
         """
         Create and save a regular user with the given email, username,
         and password.
+
+        The user's profile is created by the post_save signal inside the
+        same transaction, so both rows commit together.
         """
         if not email:
             raise ValueError("The email field is required")
@@ -43,7 +49,8 @@ class CustomUserManager(BaseUserManager):
         email = self.normalize_email(email)
         user = self.model(email=email, username=username, **extra_fields)
         user.set_password(password)
-        user.save(using=self._db)
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
         return user
 
     def create_superuser(self, email, username, password=None, **extra_fields):
@@ -65,42 +72,49 @@ class CustomUserManager(BaseUserManager):
         """
         Deactivate a user by setting their 'is_active' field to False.
 
-        If no user is found, it raises a `User.DoesNotExist` exception.
+        If no user is found, it raises a `ValueError`.
         """
-        try:
-            user = self.get(email=email)
-            user.is_active = False
-            user.save(using=self._db, update_fields=['is_active'])
-        except self.model.DoesNotExist:
-            raise ValueError(f"User with email: {email} does not exist")
+        self._update_by_email(email, is_active=False)
 
- 
     def activate_user(self, email):
         """
         Activate a user by setting their 'is_active' field to True.
 
-        If no user is found, it raises a `User.DoesNotExist` exception.
+        If no user is found, it raises a `ValueError`.
         """
-        try:
-            user = self.get(email=email)
-            user.is_active = True
-            user.save(using=self._db, update_fields=['is_active'])
-        except self.model.DoesNotExist:
+        self._update_by_email(email, is_active=True)
+
+    def _update_by_email(self, email, /, **fields):
+        """
+        Write `fields` to the user with the given email in a single UPDATE,
+        without loading the user or sending save signals.
+
+        update() skips post_save, so the caches its receivers clear, the
+        cached authentication copy of the user and the stock report
+        recipients, are dropped here instead.
+        """
+        from api.utils import AUTH_USER_CACHE_KEY
+        from product_management_service.utils import REPORT_RECIPIENTS_CACHE_KEY
+
+        if not self.filter(email=email).update(**fields):
             raise ValueError(f"User with email: {email} does not exist")
+        # The user may just have been given a new email
+        user_id = self.filter(email=fields.get('email', email)).values_list(
+            'pk', flat=True).first()
+        cache.delete_many([AUTH_USER_CACHE_KEY.format(user_id),
+                           REPORT_RECIPIENTS_CACHE_KEY])
 
-    def update_user(self, email, **update_fields):
+    def update_user(self, email, /, **update_fields):
         """
         Update a user's information based on their email.
-        The `updated_fields` argument contains the fields to update.
-        If the user is not found, it raises a `User.DoesNotExist` exception.
+        The `updated_fields` argument contains the fields to update,
+        including a new `email`; a password is hashed before it is stored.
+        If the user is not found, it raises a `ValueError`.
         """
-        try:
-            user = self.get(email=email)
-            for field, value in update_fields.items():
-                setattr(user, field, value)
-            user.save(using=self._db)
-        except self.model.DoesNotExist:
-            raise ValueError(f"User with email: {email} does not exist")
+        if 'password' in update_fields:
+            update_fields['password'] = make_password(update_fields['password'])
+        # update() skips auto_now, so the timestamp is set explicitly
+        self._update_by_email(email, updated_at=timezone.now(), **update_fields)
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -177,14 +191,18 @@ class Role(models.Model):
         db_table = "role"
     
     def add_permission(self, permission_name):
+        # Usually the role already has it, which one query can tell
+        if self.rolepermission_set.filter(permission__name=permission_name).exists():
+            return
         perm, _ = Permission.objects.get_or_create(name=permission_name)
         RolePermission.objects.get_or_create(role=self, permission=perm)
     
     def remove_permission(self, permission_name):
+        # The delete signals evict the role's holders from the permission cache
         RolePermission.objects.filter(role=self, permission__name=permission_name).delete()
         
     def get_permissions(self):
-        return [rp.permission.name for rp in self.rolepermission_set.all()]
+        return list(self.rolepermission_set.values_list('permission__name', flat=True))
 
     def __str__(self):
         return self.name
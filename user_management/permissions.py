@@ -5,16 +5,80 @@ This module provides utilities for checking user permissions based on their role
 It assumes a relationship between users, roles, and permissions where each user
 is assigned one or more roles, and each role has a set of permissions.
 
+A user's permission names are cached for a short time, since every
+protected view checks them. The signals in `signals` evict the cached
+set whenever the user's roles or those roles' permissions change.
+
 Models used:
 - `UserRole`: A model linking users to their roles.
 - `RolePermission`: A model linking roles to their associated permissions.
 """
 
-from .models import UserRole, RolePermission
+from django.core.cache import cache
+from .models import Role, UserRole, RolePermission
+
+USER_PERMISSIONS_CACHE_KEY = 'user:{}:permissions'
+USER_PERMISSIONS_CACHE_TIMEOUT = 60  # seconds
+ROLE_IDS_CACHE_KEY = 'role_ids_by_name'
+ROLE_IDS_CACHE_TIMEOUT = 60 * 60  # Cleared early when roles change
+
+
+def get_user_permissions(user_id):
+    """
+    Return the names of all permissions granted to a user by their roles.
+
+    Args:
+        user_id: The primary key of the user.
+
+    Returns:
+        frozenset: The user's permission names, read through the cache.
+    """
+    return cache.get_or_set(
+        USER_PERMISSIONS_CACHE_KEY.format(user_id),
+        lambda: frozenset(RolePermission.objects.filter(
+            role__userrole__user_id=user_id
+        ).values_list('permission__name', flat=True)),
+        USER_PERMISSIONS_CACHE_TIMEOUT
+    )
+
+
+def invalidate_user_permissions(user_ids):
+    """
+    Drop the cached permission sets of the given users.
+
+    Args:
+        user_ids (iterable): Primary keys of the users to evict.
+    """
+    cache.delete_many([USER_PERMISSIONS_CACHE_KEY.format(pk) for pk in user_ids])
+
+
+def users_with_roles(role_ids):
+    """
+    Return the ids of users holding any of the given roles.
+    """
+    return UserRole.objects.filter(role_id__in=role_ids).values_list('user_id', flat=True)
+
+
+def cached_role_id(name):
+    """
+    Get the id of the role with the given name, reading the name-to-id
+    map of all roles from the cache when possible.
+
+    Args:
+        name (str): The role name.
+
+    Returns:
+        int: The role id, or None if no role has that name.
+    """
+    role_ids = cache.get_or_set(
+        ROLE_IDS_CACHE_KEY,
+        lambda: dict(Role.objects.values_list('name', 'id')),
+        timeout=ROLE_IDS_CACHE_TIMEOUT
+    )
+    return role_ids.get(name)
+
 
 def has_permission(user, permission):
-    user_roles = UserRole.objects.filter(user=user).values_list('role', flat=True)
-    
-    role_permissions = RolePermission.objects.filter(role__in=user_roles).values_list('permission__name', flat=True)
-    
-    return permission in role_permissions
+    if not user.is_authenticated:
+        return False
+    return permission in get_user_permissions(user.pk)
@@ -4,20 +4,28 @@ Signals module for user management.
 This module contains signal receivers that handle actions related to the
 User model.
 It listens for the `post_save` signal from the User model to automatically
-create or update associated Profile objects.
+create the associated Profile object.
 
 Signal receivers:
 - create_profile: Creates a Profile instance whenever a new User is created.
-- save_profile: Saves the Profile instance whenever the associated User
-  is saved.
+- invalidate_auth_user: Drops the cached copy of a User used by
+  JWT authentication whenever the User or its Profile is saved or deleted.
+- invalidate_role_permissions: Drops cached permission sets when a user's
+  roles, or the permissions of a role, change.
+- invalidate_role_ids: Drops the cached role name-to-id map when a Role
+  is saved or deleted.
 
-This helps maintain consistency between User and Profile objects within the
-application.
+Profile holds no data derived from User, so saving a User leaves its
+Profile untouched.
 """
 
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import User, Profile
+from api.utils import AUTH_USER_CACHE_KEY
+from .models import User, Profile, Role, Permission, UserRole, RolePermission
+from .permissions import (ROLE_IDS_CACHE_KEY, invalidate_user_permissions,
+                          users_with_roles)
 
 
 @receiver(post_save, sender=User)
@@ -43,17 +51,64 @@ def create_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_profile(sender, instance, **kwargs):
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_auth_user(sender, instance, **kwargs):
     """
-    Signal receiver that saves the Profile object whenever the associated
-    User is saved.
+    Signal receiver that drops the cached authentication copy of a User.
 
-    This function ensures that any changes to the User instance are also
-    saved to the related Profile instance by calling `save()` on the Profile.
+    `JWTAuthentication` caches the user it loads, with their profile, for
+    a short time, so changes such as deactivation must evict that copy to
+    take effect immediately.
 
     Args:
-        sender (class): The model class (User) sending the signal.
-        instance (User): The instance of the User model being saved.
+        sender (class): The model class (User or Profile) sending the signal.
+        instance (User | Profile): The instance saved or deleted.
+        **kwargs: Additional keyword arguments.
+    """
+    user_id = instance.user_id if sender is Profile else instance.pk
+    cache.delete(AUTH_USER_CACHE_KEY.format(user_id))
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+@receiver(post_save, sender=Permission)
+def invalidate_role_permissions(sender, instance, **kwargs):
+    """
+    Signal receiver that drops the cached permission sets a change affects.
+
+    A changed UserRole only affects its user. A changed RolePermission
+    affects every user holding that role, and a renamed Permission every
+    user holding a role that grants it. Deleting a Role or Permission
+    cascades to these rows, which sends their own signals.
+
+    Args:
+        sender (class): The model class sending the signal.
+        instance: The UserRole, RolePermission or Permission saved or deleted.
+        **kwargs: Additional keyword arguments.
+    """
+    if sender is UserRole:
+        invalidate_user_permissions([instance.user_id])
+    elif sender is RolePermission:
+        invalidate_user_permissions(users_with_roles([instance.role_id]))
+    else:
+        role_ids = RolePermission.objects.filter(
+            permission=instance).values_list('role_id', flat=True)
+        invalidate_user_permissions(users_with_roles(role_ids))
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_role_ids(sender, instance, **kwargs):
+    """
+    Signal receiver that drops the cached role name-to-id map.
+
+    Args:
+        sender (class): The model class (Role) sending the signal.
+        instance (Role): The instance of the Role model saved or deleted.
         **kwargs: Additional keyword arguments.
     """
-    instance.profile.save()
+    cache.delete(ROLE_IDS_CACHE_KEY)
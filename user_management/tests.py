@@ -1,3 +1,240 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from .models import User, Role, UserRole, Profile
+from .permissions import has_permission
+from .views import RefreshTokenView
+from api.utils import AUTH_USER_CACHE_KEY, generate_token, generate_refresh_token
+from product_management_service.utils import REPORT_RECIPIENTS_CACHE_KEY
 
 # Create your tests here.
+
+
+class HasPermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="perm@example.com", username="perm", password="permpass"
+        )
+        cls.role = Role.objects.create(name="auditor")
+        cls.role.add_permission("audit_stock")
+        UserRole.objects.create(user=cls.user, role=cls.role)
+
+    def tearDown(self):
+        cache.clear()
+
+    # Test that a user's permissions are read once and then served from the cache
+    def test_permissions_are_cached(self):
+        self.assertTrue(has_permission(self.user, "audit_stock"))
+        with self.assertNumQueries(0):
+            self.assertTrue(has_permission(self.user, "audit_stock"))
+            self.assertFalse(has_permission(self.user, "delete_user"))
+
+    # Test that a role's permission names are read in one query
+    def test_role_get_permissions(self):
+        self.role.add_permission("count_stock")
+        with self.assertNumQueries(1):
+            permissions = self.role.get_permissions()
+        self.assertCountEqual(permissions, ["audit_stock", "count_stock"])
+
+    # Test that granting a permission the role already has is a single query
+    def test_add_existing_permission(self):
+        with self.assertNumQueries(1):
+            self.role.add_permission("audit_stock")
+        self.assertEqual(self.role.get_permissions(), ["audit_stock"])
+
+    # Test that revoking a permission collects and deletes the row, then
+    # evicts the role's holders from the cache through the delete signal
+    def test_remove_permission_query_count(self):
+        with self.assertNumQueries(3):
+            self.role.remove_permission("audit_stock")
+        self.assertEqual(self.role.get_permissions(), [])
+
+    # Test that granting or revoking a role permission takes effect immediately
+    def test_role_permission_changes_invalidate_cache(self):
+        self.assertFalse(has_permission(self.user, "delete_user"))
+        self.role.add_permission("delete_user")
+        self.assertTrue(has_permission(self.user, "delete_user"))
+        self.role.remove_permission("delete_user")
+        self.assertFalse(has_permission(self.user, "delete_user"))
+
+    # Test that removing a user's role revokes its permissions
+    def test_user_role_removal_invalidates_cache(self):
+        self.assertTrue(has_permission(self.user, "audit_stock"))
+        UserRole.objects.get(user=self.user, role=self.role).delete()
+        self.assertFalse(has_permission(self.user, "audit_stock"))
+
+
+class ProfileSignalTests(TestCase):
+    # Test that a profile is created with the user and left alone on later saves
+    def test_saving_user_does_not_write_profile(self):
+        user = User.objects.create_user(
+            email="profile@example.com", username="profile", password="profilepass"
+        )
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+        user.firstname = "Ama"
+        # Only the user row is written
+        with self.assertNumQueries(1):
+            user.save(update_fields=['firstname'])
+
+
+class UserRegisterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", username="admin", password="adminpass"
+        )
+        UserRole.objects.create(user=cls.admin, role=Role.objects.get(name="admin"))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def tearDown(self):
+        cache.clear()
+
+    # Test registering a user with a role, and rejecting an unknown role
+    def test_register_with_role(self):
+        url = reverse('user_register')
+        data = {"username": "clerk", "email": "clerk@example.com", "password": "clerkpass",
+                "firstname": "Efua", "lastname": "Mensah"}
+        response = self.client.post(url, {**data, "role": "cashier"}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(username="clerk").exists())
+
+        response = self.client.post(url, {**data, "role": "sales_rep"}, format='json')
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username="clerk")
+        self.assertTrue(has_permission(user, "view_item"))
+        self.assertFalse(has_permission(user, "edit_item"))
+
+    # Test that a taken username or email is reported before validation
+    def test_register_rejects_taken_username_or_email(self):
+        url = reverse('user_register')
+        cases = [
+            ("username", {"username": "admin", "email": "new@example.com"},
+             "A user with this username already exists"),
+            ("email", {"username": "new", "email": "admin@example.com"},
+             "A user with this email already exists"),
+        ]
+        for label, data, message in cases:
+            with self.subTest(label):
+                response = self.client.post(url, data, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['message'], message)
+
+
+class UserActivationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="active@example.com", username="active", password="activepass"
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    # Test that deactivating and activating a user are single UPDATEs by email
+    def test_remove_and_activate_user(self):
+        with self.assertNumQueries(2):
+            User.objects.remove_user("active@example.com")
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+        User.objects.activate_user("active@example.com")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+        with self.assertRaises(ValueError):
+            User.objects.remove_user("missing@example.com")
+
+    # Test that deactivating a user drops the caches its post_save would clear
+    def test_remove_user_invalidates_caches(self):
+        auth_key = AUTH_USER_CACHE_KEY.format(self.user.pk)
+        cache.set_many({auth_key: self.user, REPORT_RECIPIENTS_CACHE_KEY: [self.user.email]})
+        User.objects.remove_user("active@example.com")
+        self.assertIsNone(cache.get(auth_key))
+        self.assertIsNone(cache.get(REPORT_RECIPIENTS_CACHE_KEY))
+
+    # Test that updating a user hashes a new password and bumps updated_at
+    def test_update_user(self):
+        updated_at = self.user.updated_at
+        with self.assertNumQueries(2):
+            User.objects.update_user("active@example.com", firstname="Kofi",
+                                     password="newpass")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.firstname, "Kofi")
+        self.assertTrue(self.user.check_password("newpass"))
+        self.assertGreater(self.user.updated_at, updated_at)
+
+    # Test that changing a user's email drops the cached report recipients
+    def test_update_user_email_invalidates_caches(self):
+        auth_key = AUTH_USER_CACHE_KEY.format(self.user.pk)
+        cache.set_many({auth_key: self.user, REPORT_RECIPIENTS_CACHE_KEY: [self.user.email]})
+        User.objects.update_user("active@example.com", email="renamed@example.com")
+        self.assertIsNone(cache.get(auth_key))
+        self.assertIsNone(cache.get(REPORT_RECIPIENTS_CACHE_KEY))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "renamed@example.com")
+
+    # Test that the profile is served from the cached authenticated user
+    def test_profile_is_loaded_with_authenticated_user(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+        url = reverse('user_profile')
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user'], self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get(url).data, response.data)
+
+    # Test logging in by email or username
+    def test_login(self):
+        url = reverse('user_login')
+        for identifier in ("active@example.com", "active"):
+            with self.subTest(identifier):
+                response = self.client.post(url, {"identifier": identifier,
+                                                  "password": "activepass"})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['user'], {
+                    "id": self.user.pk, "username": "active",
+                    "email": "active@example.com"
+                })
+                self.assertIn('refresh_token', response.data)
+                self.assertEqual(response.cookies['token']['samesite'], 'Lax')
+
+    # Test that a login can skip issuing a refresh token
+    def test_login_without_refresh_token(self):
+        response = self.client.post(reverse('user_login'), {
+            "identifier": "active", "password": "activepass", "with_refresh": "false"
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.data)
+        self.assertNotIn('refresh_token', response.data)
+
+    # Test that refreshing reuses the cached user instead of querying it again
+    def test_refresh_token(self):
+        # The view isn't routed, so it is called directly
+        request = APIRequestFactory().post(
+            '/', {"refresh_token": generate_refresh_token(self.user)}, format='json',
+            HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}"
+        )
+        # Authentication loads the user once; the refresh itself reads the cache
+        with self.assertNumQueries(1):
+            response = RefreshTokenView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.data)
+
+    # Test that deactivating an unknown email answers 404
+    def test_deactivate_unknown_user(self):
+        admin = User.objects.create_user(
+            email="admin@example.com", username="admin", password="adminpass"
+        )
+        UserRole.objects.create(user=admin, role=Role.objects.get(name="admin"))
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        response = client.post(reverse('user_deactivate'),
+                               {"email": "missing@example.com"}, format='json')
+        self.assertEqual(response.status_code, 404)
@@ -5,9 +5,10 @@ from rest_framework import status
 from rest_framework.exceptions import AuthenticationFailed
 from api.serializers import UserSerializer, ProfileSerializer
 from django.db.models import Q
-from .models import Profile, User, Role, UserRole
-from .permissions import has_permission
-from api.utils import generate_token, generate_refresh_token, JWTAuthentication
+from .models import Profile, User, UserRole
+from .permissions import has_permission, cached_role_id
+from api.utils import (generate_token, generate_refresh_token,
+                       load_auth_user, JWTAuthentication)
 
 
 class UserRegisterView(APIView):
@@ -24,31 +25,39 @@ class UserRegisterView(APIView):
         email = request.data.get('email')
         user_role = request.data.get('role')
         
-        if User.objects.filter(username=username).exists():
+        # One query finds both kinds of conflict; a taken username is
+        # reported first, even when another user holds the email
+        taken = User.objects.filter(
+            Q(username=username) | Q(email=email)
+        ).values_list('username', flat=True)[:2]
+        if username in taken:
             return Response({
                 "message": "A user with this username already exists",
                 "status_code": status.HTTP_400_BAD_REQUEST
 			}, status=status.HTTP_400_BAD_REQUEST)
         
-        if User.objects.filter(email=email).exists():
+        if taken:
             return Response({
                 "message": "A user with this email already exists",
                 "status_code": status.HTTP_400_BAD_REQUEST
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Resolve the role before the user is created
+        role_id = None
+        if user_role:
+            role_id = cached_role_id(user_role)
+            if role_id is None:
+                return Response({
+                    'message': "Role does not exist",
+                    "status_code": status.HTTP_400_BAD_REQUEST
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
             
-            if user_role:
-                try:
-                    role = Role.objects.get(name=user_role)
-                    UserRole.objects.create(user=user, role=role)
-                except Role.DoesNotExist:
-                    return Response({
-                        'message': "Role does not exist",
-                        "status_code": status.HTTP_400_BAD_REQUEST
-                    }, status=status.HTTP_400_BAD_REQUEST)
+            if role_id is not None:
+                UserRole.objects.create(user=user, role_id=role_id)
             
             return Response({
                 'message': "user created successfully",
@@ -78,7 +87,10 @@ class UserLoginView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
             
         try:
-            user = User.objects.get(Q(email=identifier) | Q(username=identifier))
+            # Only what the password check and the response read
+            user = User.objects.only(
+                'id', 'username', 'email', 'password', 'is_active'
+            ).get(Q(email=identifier) | Q(username=identifier))
         except User.DoesNotExist:
             raise AuthenticationFailed('User Not Found')
         
@@ -92,21 +104,23 @@ class UserLoginView(APIView):
             raise AuthenticationFailed("Incorrect Password")
         
         token = generate_token(user)
-        refresh_token = generate_refresh_token(user)
-        
-        response = Response({
+        data = {
             "message": "Login successful",
             "token": token,
-            "refresh_token": refresh_token,
             "user": {
                 "id": user.id,
                 "username": user.username,
                 "email": user.email
             },
             "status_code": status.HTTP_200_OK
-		}, status=status.HTTP_200_OK)
-        
-        response.set_cookie(key='token', value=token, httponly=True)
+        }
+        # Clients that never refresh can skip signing a refresh token
+        if str(request.data.get('with_refresh', True)).lower() not in ('false', '0'):
+            data["refresh_token"] = generate_refresh_token(user)
+        
+        response = Response(data, status=status.HTTP_200_OK)
+        response.set_cookie(key='token', value=token, httponly=True,
+                            secure=request.is_secure(), samesite='Lax')
         return response
 
 
@@ -114,7 +128,14 @@ class UserProfileView(APIView):
     authentication_classes = [JWTAuthentication]
     
     def get(self, request):
-        profile = Profile.objects.get(user=request.user)
+        # JWTAuthentication loads the profile along with the user
+        try:
+            profile = request.user.profile
+        except Profile.DoesNotExist:
+            return Response({
+                "message": "Profile not found",
+                "status_code": status.HTTP_404_NOT_FOUND
+            }, status=status.HTTP_404_NOT_FOUND)
         serializer = ProfileSerializer(profile)
         
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -161,7 +182,7 @@ class UserDeactivateView(APIView):
                 "message": f"User with email {email} has been deactivated",
                 "status_code": status.HTTP_200_OK
             }, status=status.HTTP_200_OK)
-        except User.DoesNotExist:
+        except ValueError:
             return Response({
                 "message": f"User with email {email} does not exist",
                 "status_code": status.HTTP_404_NOT_FOUND
@@ -189,7 +210,7 @@ class UserActivateView(APIView):
                 "message": f"User with email {email} has been activated",
                 "status_code": status.HTTP_200_OK
             }, status=status.HTTP_200_OK)
-        except User.DoesNotExist:
+        except ValueError:
             return Response({
                 "message": f"User with email {email} does not exist",
                 "status_code": status.HTTP_404_NOT_FOUND
@@ -206,7 +227,8 @@ class RefreshTokenView(APIView):
         
         try:
             user_id = JWTAuthentication.decode_refresh_token(refresh_token)
-            user = User.objects.get(id=user_id)
+            # The token only needs the id; reuse the cached, narrow auth load
+            user = load_auth_user(user_id)
             new_access_token = generate_token(user)
             response = Response({'access_token': new_access_token})
             response.set_cookie(